@@ -0,0 +1,84 @@
+import numpy as np
+
+METRICS = ("waste", "theoretical", "actual", "cost")
+WINDOWS = (7, 28, 90)
+
+
+class RollingAnalytics:
+    # One ring of daily buckets per metric, (days x items), sized for the
+    # longest window, plus running per-window sums. Recording adds to
+    # today's bucket and every window sum; rolling a day over subtracts
+    # the bucket that just left each window. Reports read the sums only.
+
+    def __init__(self, items=0, windows=WINDOWS, day=0):
+        self.windows = tuple(sorted(windows))
+        self.days = self.windows[-1]
+        self.ring = np.zeros((len(METRICS), self.days, items))
+        self.sums = np.zeros((len(METRICS), len(self.windows), items))
+        self.items = items
+        self.day = day
+        self._rolled = 0
+
+    def _grow(self, items):
+        self.items = max(self.items, items)
+        have = self.ring.shape[2]
+        if items <= have:
+            return
+        items = max(items, 2 * have)
+        pad = ((0, 0), (0, 0), (0, items - have))
+        self.ring = np.pad(self.ring, pad)
+        self.sums = np.pad(self.sums, pad)
+
+    def record(self, metric, ids, amounts):
+        ids = np.atleast_1d(np.asarray(ids, dtype=np.intp))
+        if len(ids):
+            self._grow(int(ids.max()) + 1)
+        m = METRICS.index(metric)
+        np.add.at(self.ring[m, self.day % self.days], ids, amounts)
+        for w in range(len(self.windows)):
+            np.add.at(self.sums[m, w], ids, amounts)
+
+    def record_vector(self, metric, amounts):
+        # Dense per-item vector, e.g. a recipe depletion for a sales batch.
+        amounts = np.asarray(amounts, dtype=np.float64)
+        self._grow(len(amounts))
+        m = METRICS.index(metric)
+        n = len(amounts)
+        self.ring[m, self.day % self.days, :n] += amounts
+        self.sums[m, :, :n] += amounts
+
+    def advance_to(self, day):
+        if day < self.day:
+            raise ValueError("analytics cannot move back in time")
+        steps = min(day - self.day, self.days)
+        for _ in range(steps):
+            self.day += 1
+            for w, length in enumerate(self.windows):
+                self.sums[:, w] -= self.ring[:, (self.day - length) % self.days]
+            self.ring[:, self.day % self.days] = 0.0
+        self.day = day
+        self._rolled += steps
+        if self._rolled >= self.days:
+            # Bound floating-point drift from repeated add/subtract.
+            self.resync()
+
+    def resync(self):
+        for w, length in enumerate(self.windows):
+            recent = (self.day - np.arange(length)) % self.days
+            self.sums[:, w] = self.ring[:, recent].sum(axis=1)
+        self._rolled = 0
+
+    def report(self, window):
+        w = self.windows.index(window)
+        waste, theoretical, actual, cost = self.sums[:, w, :self.items]
+        variance = actual - theoretical
+        pct = np.divide(variance, theoretical,
+                        out=np.zeros_like(variance), where=theoretical != 0)
+        return {
+            "waste": waste,
+            "theoretical": theoretical,
+            "actual": actual,
+            "variance": variance,
+            "variance_pct": pct * 100,
+            "cost": cost,
+        }
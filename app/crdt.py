@@ -0,0 +1,149 @@
+import json
+import struct
+import time
+
+import numpy as np
+
+_HEADER = struct.Struct("<I")
+
+
+class PNCounters:
+    # A PN-counter per item, stored as two (devices x items) matrices of
+    # monotonically growing increments and decrements. Each device writes
+    # only its own row, so merging is an element-wise max over whole
+    # matrices: commutative, idempotent and free of any central lock.
+    #
+    # A physical count is a last-writer-wins register per item, stamped
+    # (timestamp, device), that also remembers the counters it had seen
+    # (bp/bn). Only movements beyond that baseline are added on top, so
+    # two tablets counting the same shelf agree instead of adding up.
+
+    def __init__(self, device, items=0):
+        self.device = device
+        self.devices = [device]
+        self.p = np.zeros((1, items))
+        self.n = np.zeros((1, items))
+        self.bp = np.zeros((1, items))
+        self.bn = np.zeros((1, items))
+        self.count_qty = np.zeros(items)
+        self.count_ts = np.zeros(items, dtype=np.int64)
+        self.count_by = np.full(items, "", dtype=object)
+
+    @property
+    def items(self):
+        return self.p.shape[1]
+
+    def _resize(self, devices, items):
+        # Re-lays the state out for `devices` (a superset, in order) and at
+        # least `items` columns.
+        width, items = self.items, max(items, self.items)
+        rows = [self.devices.index(d) if d in self.devices else -1
+                for d in devices]
+        present = np.array([r >= 0 for r in rows], dtype=bool)
+        src = np.array([r for r in rows if r >= 0], dtype=np.intp)
+        for name in ("p", "n", "bp", "bn"):
+            old = getattr(self, name)
+            new = np.zeros((len(devices), items))
+            new[present, :width] = old[src]
+            setattr(self, name, new)
+        extra = items - width
+        if extra:
+            self.count_qty = np.concatenate([self.count_qty, np.zeros(extra)])
+            self.count_ts = np.concatenate(
+                [self.count_ts, np.zeros(extra, dtype=np.int64)])
+            self.count_by = np.concatenate(
+                [self.count_by, np.full(extra, "", dtype=object)])
+        self.devices = list(devices)
+
+    def add(self, ids, amounts):
+        ids = np.atleast_1d(np.asarray(ids, dtype=np.intp))
+        amounts = np.atleast_1d(np.asarray(amounts, dtype=np.float64))
+        if len(ids) and ids.max() >= self.items:
+            self._resize(self.devices, int(ids.max()) + 1)
+        row = self.devices.index(self.device)
+        np.add.at(self.p[row], ids, np.maximum(amounts, 0.0))
+        np.add.at(self.n[row], ids, np.maximum(-amounts, 0.0))
+
+    def set(self, item_id, qty, ts=None):
+        if item_id >= self.items:
+            self._resize(self.devices, item_id + 1)
+        self.count_qty[item_id] = qty
+        self.count_ts[item_id] = time.time_ns() if ts is None else ts
+        self.count_by[item_id] = self.device
+        self.bp[:, item_id] = self.p[:, item_id]
+        self.bn[:, item_id] = self.n[:, item_id]
+
+    def value(self, item_id=None):
+        total = self.count_qty + (self.p - self.bp).sum(axis=0) \
+            - (self.n - self.bn).sum(axis=0)
+        return total if item_id is None else float(total[item_id])
+
+    def merge(self, other):
+        devices = self.devices + [d for d in other.devices
+                                  if d not in self.devices]
+        items = max(self.items, other.items)
+        self._resize(devices, items)
+        rows = np.array([devices.index(d) for d in other.devices],
+                        dtype=np.intp)
+        cols = other.items
+        self.p[rows, :cols] = np.maximum(self.p[rows, :cols], other.p)
+        self.n[rows, :cols] = np.maximum(self.n[rows, :cols], other.n)
+        # Later count wins; the device name breaks timestamp ties.
+        ts, by = self.count_ts[:cols], self.count_by[:cols]
+        later = (other.count_by > by).astype(bool)
+        won = np.flatnonzero((other.count_ts > ts)
+                             | ((other.count_ts == ts) & later))
+        if len(won):
+            self.count_qty[won] = other.count_qty[won]
+            self.count_ts[won] = other.count_ts[won]
+            self.count_by[won] = other.count_by[won]
+            self.bp[:, won] = 0.0
+            self.bn[:, won] = 0.0
+            self.bp[rows[:, None], won] = other.bp[:, won]
+            self.bn[rows[:, None], won] = other.bn[:, won]
+        return self
+
+    def apply_to(self, ledger, log):
+        # Merged values go through the log as counts, so they are durable
+        # and replicate like any other stock change.
+        values = self.value()
+        ledger.reserve(len(values))
+        changed = np.flatnonzero(ledger.qty[:len(values)] != values)
+        for item_id in changed.tolist():
+            log.record_count(ledger, item_id, float(values[item_id]))
+        return len(changed)
+
+    def to_bytes(self):
+        header = json.dumps({"devices": self.devices,
+                             "items": self.items,
+                             "counted_by": self.count_by.tolist()}).encode()
+        return (_HEADER.pack(len(header)) + header
+                + np.stack([self.p, self.n, self.bp, self.bn])
+                .astype("<f8").tobytes()
+                + self.count_qty.astype("<f8").tobytes()
+                + self.count_ts.astype("<i8").tobytes())
+
+    @classmethod
+    def from_bytes(cls, data, device=None):
+        (size,) = _HEADER.unpack_from(data)
+        header = json.loads(data[_HEADER.size:_HEADER.size + size])
+        shape = (len(header["devices"]), header["items"])
+        offset = _HEADER.size + size
+        body = np.frombuffer(data, dtype="<f8", count=4 * np.prod(shape),
+                             offset=offset).reshape(4, *shape)
+        offset += body.nbytes
+        count_qty = np.frombuffer(data, dtype="<f8", count=shape[1],
+                                  offset=offset)
+        count_ts = np.frombuffer(data, dtype="<i8", count=shape[1],
+                                 offset=offset + count_qty.nbytes)
+        counters = cls(device or header["devices"][0])
+        counters.devices = header["devices"]
+        counters.p, counters.n, counters.bp, counters.bn = \
+            (m.copy() for m in body)
+        counters.count_qty = count_qty.copy()
+        counters.count_ts = count_ts.astype(np.int64)
+        counters.count_by = np.array(header["counted_by"], dtype=object)
+        if counters.device not in counters.devices:
+            counters._resize(counters.devices + [counters.device],
+                             counters.items)
+        return counters
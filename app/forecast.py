@@ -0,0 +1,95 @@
+import numpy as np
+
+
+class Smoother:
+    # Exponential smoothing for many series at once: simple (alpha),
+    # Holt (+ beta) or additive Holt-Winters (+ gamma and season). State
+    # arrays have one entry per series, so a new day of usage for every
+    # SKU at every location is a handful of array operations.
+
+    def __init__(self, alpha=0.3, beta=None, gamma=None, season=0):
+        if gamma is not None and season < 2:
+            raise ValueError("seasonal smoothing needs season >= 2")
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+        self.season = season if gamma is not None else 0
+        self.level = None
+        self.trend = None
+        self.seasonal = None
+        self.t = 0
+
+    def fit(self, history):
+        # history is (time x series...); state is initialised from the
+        # first season (or first observation) and then rolled forward.
+        history = np.asarray(history, dtype=np.float64)
+        m = self.season
+        head = history[:m] if m else history[:1]
+        if not len(head):
+            raise ValueError("cannot fit an empty history")
+        self.level = np.nan_to_num(np.nanmean(head, axis=0))
+        self.trend = np.zeros_like(self.level)
+        if self.beta is not None and m and len(history) >= 2 * m:
+            second = np.nanmean(history[m:2 * m], axis=0)
+            self.trend = np.nan_to_num((second - self.level) / m)
+        if m:
+            self.seasonal = np.nan_to_num(head - self.level)
+            if len(self.seasonal) < m:
+                pad = np.zeros((m - len(self.seasonal),) + self.level.shape)
+                self.seasonal = np.concatenate([self.seasonal, pad])
+        self.t = 0
+        for row in history:
+            self.update(row)
+        return self
+
+    def update(self, obs):
+        # One new observation per series; NaN leaves that series untouched.
+        obs = np.asarray(obs, dtype=np.float64)
+        if self.level is None:
+            self.level = np.nan_to_num(obs)
+            self.trend = np.zeros_like(self.level)
+            if self.season:
+                self.seasonal = np.zeros((self.season,) + obs.shape)
+        seen = ~np.isnan(obs)
+        obs = np.where(seen, obs, 0.0)
+        s = self.seasonal[self.t % self.season] if self.season else 0.0
+        level = self.alpha * (obs - s) \
+            + (1 - self.alpha) * (self.level + self.trend)
+        if self.beta is not None:
+            trend = self.beta * (level - self.level) \
+                + (1 - self.beta) * self.trend
+            self.trend = np.where(seen, trend, self.trend)
+        if self.season:
+            season = self.gamma * (obs - level) + (1 - self.gamma) * s
+            self.seasonal[self.t % self.season] = np.where(seen, season, s)
+        self.level = np.where(seen, level, self.level)
+        self.t += 1
+
+    def forecast(self, horizon):
+        steps = np.arange(1, horizon + 1).reshape((-1,) + (1,) * self.level.ndim)
+        out = self.level + steps * self.trend
+        if self.season:
+            out = out + self.seasonal[(self.t + steps.ravel() - 1) % self.season]
+        return out
+
+    def save(self, path):
+        np.savez(path, level=self.level, trend=self.trend,
+                 seasonal=self.seasonal if self.season else np.zeros(0),
+                 t=self.t, params=np.array([
+                     self.alpha,
+                     np.nan if self.beta is None else self.beta,
+                     np.nan if self.gamma is None else self.gamma,
+                     self.season]))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            alpha, beta, gamma, season = data["params"].tolist()
+            smoother = cls(alpha, None if np.isnan(beta) else beta,
+                           None if np.isnan(gamma) else gamma, int(season))
+            smoother.level = data["level"]
+            smoother.trend = data["trend"]
+            if smoother.season:
+                smoother.seasonal = data["seasonal"]
+            smoother.t = int(data["t"])
+        return smoother
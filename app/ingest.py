@@ -0,0 +1,113 @@
+import csv
+import json
+import os
+import time
+import zlib
+from collections import namedtuple
+
+import numpy as np
+
+Sale = namedtuple("Sale", "dish qty ts")
+
+
+def tail_lines(path, offset=0, poll=0.5, follow=True, sleep=time.sleep):
+    # Yields (line, offset just past it) for each complete line appended to
+    # the file, resuming at `offset`. While following, yields None after
+    # every idle poll so downstream stages can act on time.
+    with open(path, "rb") as f:
+        f.seek(offset)
+        pending = b""
+        while True:
+            chunk = f.readline()
+            if chunk:
+                pending += chunk
+                if pending.endswith(b"\n"):
+                    offset += len(pending)
+                    yield pending.decode().rstrip("\r\n"), offset
+                    pending = b""
+                continue
+            if not follow:
+                return
+            yield None
+            sleep(poll)
+
+
+def read_header(path):
+    # CSV column names from line 0, for runs that resume past it.
+    with open(path, newline="") as f:
+        return next(csv.reader([f.readline()]), None)
+
+
+def parse_sales(lines, book, fmt="jsonl", skipped=None, header=None):
+    # (line, offset) -> (Sale, offset); heartbeats pass through untouched.
+    # Without a header, the first CSV line read is taken as one.
+    for entry in lines:
+        if entry is None:
+            yield None
+            continue
+        line, offset = entry
+        if not line.strip():
+            continue
+        try:
+            if fmt == "jsonl":
+                row = json.loads(line)
+            else:
+                values = next(csv.reader([line]))
+                if header is None:
+                    header = values
+                    continue
+                row = dict(zip(header, values))
+            sale = Sale(book.dish_id(row["dish"]), float(row.get("qty", 1)),
+                        row.get("ts"))
+        except (KeyError, ValueError, TypeError):
+            if skipped is not None:
+                skipped.append(line)
+            continue
+        yield sale, offset
+
+
+def micro_batches(sales, max_count=500, max_seconds=1.0,
+                  clock=time.monotonic):
+    # Groups sales into lists of (Sale, offset), closing a batch when it is
+    # full or its first sale has waited `max_seconds`.
+    batch, started = [], None
+    for entry in sales:
+        if entry is not None:
+            if not batch:
+                started = clock()
+            batch.append(entry)
+        if batch and (len(batch) >= max_count
+                      or clock() - started >= max_seconds):
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def source_id(path):
+    # Stable id for an export file, used to tag its resume marks.
+    return zlib.crc32(os.path.abspath(path).encode())
+
+
+def ingest(book, log, path, offset=0, fmt="jsonl", max_count=500,
+           max_seconds=1.0, follow=True, poll=0.5, on_batch=None,
+           source=None):
+    # One bulk depletion per batch; returns the offset of the last applied
+    # sale so the next run can resume there. With a source id, each
+    # batch's end offset is logged in the same write as its depletion, so
+    # log.last_mark(source) is exactly where a restart should pick up.
+    header = read_header(path) if fmt == "csv" and offset > 0 else None
+    lines = tail_lines(path, offset, poll=poll, follow=follow)
+    batches = micro_batches(parse_sales(lines, book, fmt, header=header),
+                            max_count, max_seconds)
+    for batch in batches:
+        dishes = np.fromiter((sale.dish for sale, _ in batch), np.intp,
+                             len(batch))
+        counts = np.fromiter((sale.qty for sale, _ in batch), np.float64,
+                             len(batch))
+        offset = batch[-1][1]
+        mark = None if source is None else (source, offset)
+        book.deplete(log, book.sales_vector(dishes, counts), mark)
+        if on_batch is not None:
+            on_batch(len(batch), offset)
+    return offset
@@ -0,0 +1,252 @@
+import re
+from collections import namedtuple
+
+ACTION = "action"
+NUMBER = "number"
+SCALE = "scale"
+UNIT = "unit"
+ITEM = "item"
+FILLER = "filler"
+
+_END = None
+
+Intent = namedtuple("Intent", "action item quantity unit text")
+
+ACTIONS = {
+    "add": ["add", "received", "receive", "got", "delivered", "restock",
+            "restocked"],
+    "use": ["used", "use", "took", "pulled", "remove", "removed"],
+    "waste": ["wasted", "waste", "tossed", "threw out", "spoiled",
+              "dumped"],
+    "count": ["count", "counted", "we have", "there are", "there is",
+              "set"],
+    "query": ["how much", "how many", "what's left of", "check"],
+    "86": ["86", "eighty six", "eighty-six", "we're out of", "out of"],
+    "low": ["what do i need to order", "what do we need to order",
+            "what's running low", "what is running low", "what's low",
+            "what is low"],
+    "expiring": ["what expires", "what's expiring", "what is expiring",
+                 "what's going bad", "what is going bad"],
+}
+
+# Whole-store actions that do not name an item.
+STORE_ACTIONS = {"low", "expiring"}
+
+NUMBERS = {
+    "a": 1, "an": 1, "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4,
+    "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+    "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14,
+    "fifteen": 15, "sixteen": 16, "seventeen": 17, "eighteen": 18,
+    "nineteen": 19, "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50,
+    "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90,
+    "half": 0.5, "a half": 0.5, "a quarter": 0.25, "quarter": 0.25,
+    "half a dozen": 6, "a couple": 2, "a couple of": 2,
+}
+
+# Words that multiply the number spoken before them ("two hundred",
+# "a dozen"); on their own they stand for one of themselves.
+SCALES = {"hundred": 100, "thousand": 1000, "dozen": 12}
+
+UNIT_WORDS = {
+    "ea": ["each", "ea", "piece", "pieces", "unit", "units"],
+    "lb": ["pound", "pounds", "lb", "lbs"],
+    "oz": ["ounce", "ounces", "oz"],
+    "case": ["case", "cases"],
+    "qt": ["quart", "quarts", "qt", "qts"],
+    "#10": ["#10 can", "#10 cans", "number ten can", "number ten cans",
+            "can", "cans"],
+}
+
+FILLERS = ["of", "the", "is", "are", "left", "do", "we", "have", "some",
+           "please", "in", "stock", "on", "hand", "more", "to", "and"]
+
+# Speech engines often group digits ("1,000"); keep those as one token.
+_TOKEN = re.compile(r"#?\d{1,3}(?:,\d{3})+(?:\.\d+)?|#?\d+(?:\.\d+)?|[\w'-]+")
+
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower())
+
+
+def _number(token):
+    try:
+        return float(token.replace(",", ""))
+    except ValueError:
+        return None
+
+
+def fold_number(parts):
+    # parts: (NUMBER | SCALE, value) tokens of one spoken number, e.g.
+    # two hundred and twenty five -> 225. Returns None for sequences that
+    # are not a single number ("two three", "twenty thirty").
+    total = current = 0
+    for kind, value in parts:
+        if kind == SCALE:
+            current = (current or 1) * value
+            if value >= 1000:
+                total, current = total + current, 0
+            continue
+        below = current % 100
+        if value < 1:
+            pass
+        elif (value >= 100 and current
+              or value >= 10 and below
+              or below % 10 or 10 < below < 20):
+            return None
+        current += value
+    return float(total + current)
+
+
+def _variants(name):
+    yield name
+    if name.endswith("s"):
+        yield name[:-1]
+        if name.endswith("es"):
+            yield name[:-2]
+    else:
+        yield name + "s"
+
+
+class IntentParser:
+    # All vocabulary, including every item name and synonym, is compiled
+    # into one token trie. Parsing is a single longest-match walk over the
+    # utterance followed by a fixed slot-filling pass, so cost depends on
+    # utterance length rather than vocabulary size.
+
+    def __init__(self, ledger, synonyms=None, resolver=None):
+        self.ledger = ledger
+        self.resolver = resolver
+        self.trie = {}
+        for action, phrases in ACTIONS.items():
+            for phrase in phrases:
+                self._insert(phrase, (ACTION, action))
+        for phrase, value in NUMBERS.items():
+            self._insert(phrase, (NUMBER, value))
+        for word, value in SCALES.items():
+            self._insert(word, (SCALE, value))
+        for unit, phrases in UNIT_WORDS.items():
+            for phrase in phrases:
+                self._insert(phrase, (UNIT, unit))
+        for word in FILLERS:
+            self._insert(word, (FILLER, word))
+        for item_id, name in enumerate(ledger.names):
+            if name:
+                self.add_synonym(name, item_id)
+        for phrase, name in (synonyms or {}).items():
+            self.add_synonym(phrase, ledger.item_id(name))
+        ledger.subscribe_catalog(self._on_catalog)
+
+    def _on_catalog(self, item_id, old, new):
+        if old:
+            self.remove_synonym(old, item_id)
+        if new:
+            self.add_synonym(new, item_id)
+
+    def _insert(self, phrase, value, overwrite=True):
+        node = self.trie
+        for token in tokenize(phrase):
+            node = node.setdefault(token, {})
+        if overwrite or _END not in node:
+            node[_END] = value
+
+    def add_synonym(self, phrase, item_id):
+        for i, variant in enumerate(_variants(phrase)):
+            # Generated plural/singular forms never shadow real vocabulary.
+            self._insert(variant, (ITEM, item_id), overwrite=i == 0)
+
+    def remove_synonym(self, phrase, item_id):
+        # Drops the phrase and its generated forms where they still point
+        # at item_id, pruning branches left empty.
+        for variant in _variants(phrase):
+            path, node = [], self.trie
+            for token in tokenize(variant):
+                if token not in node:
+                    break
+                path.append((node, token))
+                node = node[token]
+            else:
+                if node.get(_END) != (ITEM, item_id):
+                    continue
+                del node[_END]
+                for parent, token in reversed(path):
+                    if parent[token]:
+                        break
+                    del parent[token]
+
+    def tag(self, tokens):
+        tagged = []
+        i, n = 0, len(tokens)
+        while i < n:
+            node, j, best = self.trie, i, None
+            while j < n and tokens[j] in node:
+                node = node[tokens[j]]
+                j += 1
+                if _END in node:
+                    best = (j, node[_END])
+            if best is not None:
+                i, value = best
+                tagged.append(value)
+                continue
+            number = _number(tokens[i])
+            if number is not None:
+                tagged.append((NUMBER, number))
+            else:
+                tagged.append((None, tokens[i]))
+            i += 1
+        return tagged
+
+    def _resolve(self, unknown):
+        # Misheard item names fall through the trie as unknown tokens.
+        if self.resolver is None or not unknown:
+            return None
+        for phrase in [" ".join(unknown)] + unknown:
+            item = self.resolver.resolve(phrase)
+            if item is not None:
+                return item
+        return None
+
+    def parse(self, text):
+        action = item = unit = None
+        unknown, numbers = [], []
+        # Runs of number words, joined by "and", are folded into one value.
+        run = None
+        for kind, value in self.tag(tokenize(text)):
+            if kind == ACTION and value == "86" and action is not None:
+                kind, value = NUMBER, 86
+            if kind in (NUMBER, SCALE):
+                if run is None:
+                    run = []
+                    numbers.append(run)
+                run.append((kind, value))
+                continue
+            if not (kind == FILLER and value == "and" and run):
+                run = None
+            if kind == ACTION:
+                if action is None:
+                    action = value
+            elif kind == UNIT and unit is None:
+                unit = value
+            elif kind == ITEM and item is None:
+                item = value
+            elif kind is None:
+                unknown.append(value)
+        if action in STORE_ACTIONS:
+            return Intent(action, None, None, None, text)
+        if item is None:
+            item = self._resolve(unknown)
+        if action is None or item is None:
+            return None
+        if action == "86":
+            quantity, unit = 0.0, None
+        elif action == "query":
+            quantity = None
+        elif len(numbers) != 1:
+            # No amount, or two competing ones: never guess a quantity.
+            return None
+        else:
+            quantity = fold_number(numbers[0])
+            if quantity is None:
+                return None
+        return Intent(action, item, quantity, unit, text)
+
+    __call__ = parse
@@ -0,0 +1,178 @@
+import numpy as np
+
+UNITS = ("ea", "lb", "oz", "case", "qt", "#10")
+
+
+def normalize(name):
+    return " ".join(name.lower().split())
+
+
+class Ledger:
+    # Columnar store: item N lives at index N of every column, so whole-store
+    # queries are single vectorized passes and there is no per-item object.
+
+    def __init__(self, capacity=1024):
+        self.names = []
+        self.ids = {}
+        self._qty = np.zeros(capacity, dtype=np.float64)
+        self._par = np.zeros(capacity, dtype=np.float64)
+        self._unit = np.zeros(capacity, dtype=np.uint8)
+        self.size = 0
+        self.catalog_listeners = []
+        self.write_listeners = []
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def qty(self):
+        return self._qty[:self.size]
+
+    @property
+    def par(self):
+        return self._par[:self.size]
+
+    @property
+    def unit(self):
+        return self._unit[:self.size]
+
+    def _grow(self, needed):
+        capacity = len(self._qty)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for attr in ("_qty", "_par", "_unit"):
+            old = getattr(self, attr)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, attr, new)
+
+    def add_item(self, name, unit="ea", par=0.0, qty=0.0):
+        key = normalize(name)
+        if not key:
+            raise ValueError("item name must not be empty")
+        if key in self.ids:
+            raise ValueError(f"duplicate item: {name!r}")
+        if unit not in UNITS:
+            raise ValueError(f"unknown unit: {unit!r}")
+        item_id = self.size
+        self._grow(item_id + 1)
+        self._qty[item_id] = qty
+        self._par[item_id] = par
+        self._unit[item_id] = UNITS.index(unit)
+        self.names.append(key)
+        self.ids[key] = item_id
+        self.size += 1
+        self._catalog_changed(item_id, "", key)
+        return item_id
+
+    def subscribe_catalog(self, listener):
+        # listener(item_id, old_name, new_name); old_name is "" for new items.
+        self.catalog_listeners.append(listener)
+
+    def subscribe_writes(self, listener):
+        # listener(ids) after quantities or pars change; ids is an int or
+        # an array of item ids.
+        self.write_listeners.append(listener)
+
+    def _written(self, ids):
+        for listener in self.write_listeners:
+            listener(ids)
+
+    def _catalog_changed(self, item_id, old, new):
+        for listener in self.catalog_listeners:
+            listener(item_id, old, new)
+
+    def rename_item(self, item_id, name):
+        self._check(item_id)
+        key = normalize(name)
+        if not key:
+            raise ValueError("item name must not be empty")
+        if self.ids.get(key, item_id) != item_id:
+            raise ValueError(f"duplicate item: {name!r}")
+        old = self.names[item_id]
+        self.ids.pop(old, None)
+        self.names[item_id] = key
+        self.ids[key] = item_id
+        self._catalog_changed(item_id, old, key)
+
+    def reserve(self, count):
+        # Placeholder rows for ids known only from stored state (no name yet).
+        if count <= self.size:
+            return
+        self._grow(count)
+        self.names.extend([""] * (count - self.size))
+        self.size = count
+
+    def item_id(self, name):
+        return self.ids[normalize(name)]
+
+    def item(self, item_id):
+        return {
+            "id": item_id,
+            "name": self.names[item_id],
+            "qty": float(self._qty[item_id]),
+            "par": float(self._par[item_id]),
+            "unit": UNITS[self._unit[item_id]],
+        }
+
+    def _check(self, item_id):
+        if not 0 <= item_id < self.size:
+            raise IndexError(f"unknown item id: {item_id}")
+
+    def adjust(self, item_id, delta):
+        self._check(item_id)
+        self._qty[item_id] += delta
+        self._written(item_id)
+        return float(self._qty[item_id])
+
+    def set_qty(self, item_id, qty):
+        self._check(item_id)
+        self._qty[item_id] = qty
+        self._written(item_id)
+
+    def set_par(self, item_id, par):
+        self._check(item_id)
+        self._par[item_id] = par
+        self._written(item_id)
+
+    def _check_batch(self, ids):
+        ids = np.asarray(ids, dtype=np.intp)
+        if len(ids) and (ids.min() < 0 or ids.max() >= self.size):
+            raise IndexError("unknown item id in batch")
+        return ids
+
+    def apply(self, ids, deltas):
+        ids = self._check_batch(ids)
+        np.add.at(self._qty, ids, deltas)
+        self._written(ids)
+
+    def assign(self, ids, values):
+        ids = self._check_batch(ids)
+        self._qty[ids] = values
+        self._written(ids)
+
+    def assign_par(self, ids, values):
+        ids = self._check_batch(ids)
+        self._par[ids] = values
+        self._written(ids)
+
+    def below_par(self):
+        qty, par = self.qty, self.par
+        return np.flatnonzero((par > 0) & (qty < par))
+
+    @classmethod
+    def from_columns(cls, names, qty, par, unit):
+        ledger = cls(capacity=max(len(names), 1))
+        ledger.size = len(names)
+        ledger._qty[:ledger.size] = qty
+        ledger._par[:ledger.size] = par
+        ledger._unit[:ledger.size] = unit
+        ledger.names = list(names)
+        ledger.ids = {name: i for i, name in enumerate(names) if name}
+        return ledger
+
+    def columns(self):
+        return (list(self.names), self.qty.copy(), self.par.copy(),
+                self.unit.copy())
@@ -0,0 +1,156 @@
+import heapq
+import itertools
+import json
+import os
+import time
+from collections import deque
+
+from app.ledger import normalize
+from app.txlog import OP_ADJUST, OP_SET
+
+QTY, RECEIVED, EXPIRY, ITEM = range(4)
+
+
+class LotTracker:
+    # Received lots live in one deque per item, oldest first, so depletion
+    # is FIFO from the left. A global min-heap of (expiry, lot id) answers
+    # "what expires soon" by popping only the entries inside the window;
+    # consumed lots are dropped from the heap lazily. Lots received without
+    # an expiry get one from the item's shelf life (seconds), if known;
+    # otherwise they are tracked FIFO but never reported as expiring.
+
+    def __init__(self, shelf_life=None):
+        self.shelf_life = dict(shelf_life or {})
+        self.seq = 0
+        self.by_item = {}
+        self.lots = {}
+        self.heap = []
+        self._ids = itertools.count()
+
+    def __len__(self):
+        return len(self.lots)
+
+    def receive(self, item_id, qty, expiry=None, received=None):
+        if qty <= 0:
+            raise ValueError("lot quantity must be positive")
+        received = time.time() if received is None else received
+        if expiry is None and item_id in self.shelf_life:
+            expiry = received + self.shelf_life[item_id]
+        lot_id = next(self._ids)
+        lot = [qty, received, expiry, item_id]
+        self.by_item.setdefault(item_id, deque()).append(lot_id)
+        self.lots[lot_id] = lot
+        if expiry is not None:
+            heapq.heappush(self.heap, (expiry, lot_id))
+        return lot_id
+
+    def on_hand(self, item_id):
+        return sum(self.lots[i][QTY] for i in self.by_item.get(item_id, ()))
+
+    def consume(self, item_id, qty):
+        # Returns [(lot id, qty taken)] and any quantity no lot could cover.
+        taken = []
+        queue = self.by_item.get(item_id)
+        while qty > 0 and queue:
+            lot_id = queue[0]
+            lot = self.lots[lot_id]
+            used = min(qty, lot[QTY])
+            lot[QTY] -= used
+            qty -= used
+            taken.append((lot_id, used))
+            if lot[QTY] <= 0:
+                queue.popleft()
+                del self.lots[lot_id]
+        if queue is not None and not queue:
+            del self.by_item[item_id]
+        return taken, qty
+
+    def set_on_hand(self, item_id, qty):
+        # A physical count below what the lots hold retires the oldest
+        # stock first; a count above it is left unassigned to any lot.
+        excess = self.on_hand(item_id) - qty
+        if excess > 0:
+            self.consume(item_id, excess)
+
+    def catch_up(self, log):
+        # Follows the stock log from self.seq: receipts open lots, other
+        # decreases consume FIFO and counts retire the oldest excess. Lots
+        # are thus ordered with, and as durable as, the log itself.
+        recs = log.records(self.seq)
+        for ts, item_id, op, value in zip(recs["ts"].tolist(),
+                                          recs["item"].tolist(),
+                                          recs["op"].tolist(),
+                                          recs["value"].tolist()):
+            if op == OP_ADJUST and value > 0:
+                self.receive(item_id, value, received=ts / 1e9)
+            elif op == OP_ADJUST and value < 0:
+                self.consume(item_id, -value)
+            elif op == OP_SET:
+                self.set_on_hand(item_id, value)
+        self.seq += len(recs)
+        return len(recs)
+
+    def undated(self):
+        return sum(1 for lot in self.lots.values() if lot[EXPIRY] is None)
+
+    def discard(self, lot_id):
+        # Throw out a whole lot (e.g. it expired); returns its quantity.
+        lot = self.lots.pop(lot_id)
+        self.by_item[lot[ITEM]].remove(lot_id)
+        if not self.by_item[lot[ITEM]]:
+            del self.by_item[lot[ITEM]]
+        return lot[QTY]
+
+    def expiring(self, within, now=None):
+        # [(lot id, item id, qty, expiry)] for live lots expiring before
+        # now + within, soonest first.
+        cutoff = (time.time() if now is None else now) + within
+        found, keep = [], []
+        while self.heap and self.heap[0][0] <= cutoff:
+            entry = heapq.heappop(self.heap)
+            lot = self.lots.get(entry[1])
+            if lot is None:
+                continue
+            keep.append(entry)
+            found.append((entry[1], lot[ITEM], lot[QTY], lot[EXPIRY]))
+        for entry in keep:
+            heapq.heappush(self.heap, entry)
+        return found
+
+    def save(self, path):
+        # Checkpoint of the lots as of log position self.seq, taken with
+        # snapshots and at shutdown; catch_up() replays the rest. Lots are
+        # in id order, which is also each item's FIFO order.
+        rows = [[lot[ITEM], lot[QTY], lot[RECEIVED], lot[EXPIRY]]
+                for _, lot in sorted(self.lots.items())]
+        with open(f"{path}.tmp", "w") as f:
+            json.dump({"seq": self.seq, "lots": rows}, f)
+        os.replace(f"{path}.tmp", path)
+
+    @classmethod
+    def load(cls, path, shelf_life=None, log=None):
+        tracker = cls(shelf_life)
+        if os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            if log is None or state["seq"] <= len(log):
+                for item_id, qty, received, expiry in state["lots"]:
+                    tracker.receive(item_id, qty, expiry, received)
+                tracker.seq = state["seq"]
+        if log is not None:
+            tracker.catch_up(log)
+        return tracker
+
+
+def load_shelf_life(ledger, path):
+    # {"item name": days} -> {item id: seconds}; unknown names are skipped.
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        days = json.load(f)
+    shelf_life = {}
+    for name, d in days.items():
+        item_id = ledger.ids.get(normalize(name))
+        if item_id is not None:
+            shelf_life[item_id] = float(d) * 86400
+    return shelf_life
@@ -1,5 +1,327 @@
-def run():
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+from app.cache import LRUCache
+from app.forecast import Smoother
+from app.ingest import ingest, source_id
+from app.intents import IntentParser
+from app.ledger import UNITS
+from app.lots import LotTracker, load_shelf_life
+from app.phonetic import PhoneticIndex
+from app.pipeline import Pipeline, read_chunks
+from app.planning import plan_fleet
+from app.recipes import load_recipes
+from app.replicate import (ReplicationServer, Replica, SnapshotWatch,
+                           apply_from_dir, ship, ship_to_dir)
+from app.resolver import ItemResolver
+from app.snapshot import LOG_NAME, SNAPSHOT_NAME, Snapshotter, recover
+from app.speech import FixtureEngine, Transcriber
+from app.txlog import TransactionLog
+from app.units import UnitTable
+from app.wakeword import FixtureSpotter, WakeGate
+from app.watchlist import Watchlist
+
+CHUNK_BYTES = 3200
+LOTS_NAME = "lots.json"
+SHELF_LIFE_NAME = "shelf_life.json"
+STATE_NAME = "forecast.npz"
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="invyntra")
+    parser.add_argument("--data-dir",
+                        default=os.environ.get("INVYNTRA_DATA", "data"))
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("status", help="recover state and report (default)")
+    listen = sub.add_parser("listen", help="run the voice command pipeline")
+    listen.add_argument("--queue-size", type=int, default=64)
+    listen.add_argument("--fixtures", metavar="DIR",
+                        help="recognize canned PCM recordings from DIR; "
+                             "without it, stdin lines are taken as text")
+    listen.add_argument("--wake", metavar="PCM", action="append",
+                        help="wake phrase recording; audio is only "
+                             "transcribed after it is heard (repeatable)")
+    pos = sub.add_parser("ingest", help="deplete stock from a POS export")
+    pos.add_argument("export", help="growing JSONL or CSV sales file")
+    pos.add_argument("--recipes", required=True, help="recipe JSON file")
+    pos.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    pos.add_argument("--batch-size", type=int, default=500)
+    pos.add_argument("--batch-seconds", type=float, default=1.0)
+    pos.add_argument("--once", action="store_true",
+                     help="apply what is there now instead of following")
+    plan = sub.add_parser("plan", help="nightly forecast and reorder run")
+    plan.add_argument("inputs", help="npz with usage (days x locations x "
+                                     "items), on_hand and lead_days")
+    plan.add_argument("--out", required=True, help="npz to write")
+    plan.add_argument("--workers", type=int, default=None)
+    plan.add_argument("--horizon", type=int, default=7)
+    plan.add_argument("--state", metavar="NPZ",
+                      help="smoother state carried between nightly runs "
+                           "(default: DATA_DIR/forecast.npz)")
+    plan.add_argument("--new-days", type=int, default=1,
+                      help="trailing days of usage not yet seen by the "
+                           "saved state")
+    rep = sub.add_parser("replicate",
+                         help="ship this store's log or receive others'")
+    rep.add_argument("role", choices=("send", "receive"))
+    where = rep.add_mutually_exclusive_group(required=True)
+    where.add_argument("--address", metavar="HOST:PORT",
+                       help="receiver socket address")
+    where.add_argument("--dir", help="shared directory for log segments")
+    rep.add_argument("--store", help="store name (send)")
+    rep.add_argument("--root", default="replicas",
+                     help="where received store logs live (receive)")
+    rep.add_argument("--poll", type=float, default=1.0)
+    rep.add_argument("--once", action="store_true")
+    return parser.parse_args(argv)
+
+
+def answer_query(ledger, item_id, asked_unit, units=None):
+    # Answers in the unit asked for when it converts, else the stock unit.
+    qty, unit = float(ledger.qty[item_id]), UNITS[ledger.unit[item_id]]
+    if asked_unit is not None and asked_unit != unit and units is not None:
+        try:
+            qty = units.convert_one(item_id, qty, unit, asked_unit)
+            unit = asked_unit
+        except ValueError:
+            pass
+    return f"{ledger.names[item_id]}: {qty:g} {unit}"
+
+
+def apply_intent(ledger, log, intent, units=None, watchlist=None,
+                 lots=None):
+    if intent.action == "expiring":
+        if lots is None:
+            return "Lot tracking isn't set up, so I can't tell what expires."
+        if log is not None:
+            lots.catch_up(log)
+        soon = lots.expiring(48 * 3600)
+        undated = lots.undated()
+        note = f" ({undated} lots have no expiry date)" if undated else ""
+        if not soon:
+            return "Nothing expires in the next 48 hours." + note
+        listed = ", ".join(f"{qty:g} {ledger.names[item]}"
+                           for _, item, qty, _ in soon)
+        return f"Expiring soon: {listed}{note}"
+    if intent.action == "low":
+        low = watchlist.items() if watchlist is not None else \
+            ledger.below_par().tolist()
+        if not low:
+            return "Nothing is below par."
+        return "Running low: " + ", ".join(ledger.names[i] for i in low)
+    item_id, qty = intent.item, intent.quantity
+    unit = UNITS[ledger.unit[item_id]]
+    if intent.action == "query":
+        return answer_query(ledger, item_id, intent.unit, units)
+    if intent.unit is not None and intent.unit != unit:
+        try:
+            if units is None:
+                raise ValueError(intent.unit)
+            qty = units.convert_one(item_id, qty, intent.unit, unit)
+        except ValueError:
+            return f"can't record {intent.unit} of {ledger.names[item_id]}"
+    if intent.action == "add":
+        log.record(ledger, item_id, qty)
+    elif intent.action in ("use", "waste"):
+        log.record(ledger, item_id, -qty)
+    elif intent.action in ("count", "86"):
+        log.record_count(ledger, item_id, qty)
+    if lots is not None:
+        lots.catch_up(log)
+    return f"{ledger.names[item_id]}: {ledger.qty[item_id]:g} {unit}"
+
+
+def load_lots(ledger, log, data_dir):
+    # Lots are derived from the stock log; lots.json is only a checkpoint
+    # written with snapshots. Shelf lives are optional, hand-edited
+    # {"item name": days}.
+    shelf_life = load_shelf_life(ledger,
+                                 os.path.join(data_dir, SHELF_LIFE_NAME))
+    path = os.path.join(data_dir, LOTS_NAME)
+    return LotTracker.load(path, shelf_life, log), path
+
+
+def listen(ledger, log, snapshotter, queue_size, fixtures=None, wake=None,
+           data_dir="data"):
+    units = UnitTable(ledger, cache=LRUCache(512))
+    resolver = ItemResolver(ledger, phonetic=PhoneticIndex(ledger),
+                            cache=LRUCache(1024))
+    watchlist = Watchlist(ledger)
+    lots, lots_path = load_lots(ledger, log, data_dir)
+
+    def apply(intent):
+        print(apply_intent(ledger, log, intent, units, watchlist, lots))
+        if snapshotter.maybe_snapshot(ledger, log) is not None:
+            lots.save(lots_path)
+
+    if fixtures:
+        engine = FixtureEngine.from_dir(fixtures)
+        transcribe = Transcriber(engine, on_partial=lambda t: print(f"... {t}"))
+        read = lambda: sys.stdin.buffer.read(CHUNK_BYTES)
+        gate = WakeGate(FixtureSpotter.from_files(wake)) if wake else None
+    else:
+        transcribe = lambda chunk: chunk.decode().strip() or None
+        read = sys.stdin.buffer.readline
+        gate = None
+    pipeline = Pipeline(
+        transcribe=transcribe,
+        parse=IntentParser(ledger, resolver=resolver),
+        apply=apply,
+        maxsize=queue_size,
+        gate=gate,
+    )
+    stats = asyncio.run(pipeline.run(read_chunks(read)))
+    lots.save(lots_path)
+    if gate is not None:
+        stats.append(gate.stats())
+    stats.append({"cache": "resolver", **resolver.cache.stats()})
+    stats.append({"cache": "units", **units.cache.stats()})
+    for stage in stats:
+        print(" ".join(f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}"
+                       for k, v in stage.items()))
+
+
+def ingest_sales(ledger, log, snapshotter, args):
+    book = load_recipes(ledger, args.recipes)
+    lots, lots_path = load_lots(ledger, log, args.data_dir)
+    # The resume offset lives in the stock log, written with each batch's
+    # depletion, so a crash can neither skip nor repeat a batch.
+    source = source_id(args.export)
+    offset = log.last_mark(source)
+
+    def on_batch(count, offset):
+        lots.catch_up(log)
+        if snapshotter.maybe_snapshot(ledger, log) is not None:
+            lots.save(lots_path)
+        print(f"Applied {count} sales (offset {offset}).")
+
+    try:
+        ingest(book, log, args.export, offset, fmt=args.format,
+               max_count=args.batch_size, max_seconds=args.batch_seconds,
+               follow=not args.once, on_batch=on_batch, source=source)
+    except KeyboardInterrupt:
+        pass
+    lots.save(lots_path)
+
+
+def plan_run(args):
+    with np.load(args.inputs) as data:
+        inputs = {key: data[key] for key in data.files}
+    # The first night fits on the whole usage window; later nights only
+    # roll the saved state forward by the new days.
+    state_path = args.state or os.path.join(args.data_dir, STATE_NAME)
+    if os.path.exists(state_path):
+        model = Smoother.load(state_path)
+    else:
+        model = Smoother(0.3, 0.1, 0.2, season=7)
+    start = time.perf_counter()
+    result = plan_fleet(inputs["usage"], inputs["on_hand"],
+                        inputs.get("lead_days", 1.0),
+                        case_pack=inputs.get("case_pack", 1.0),
+                        workers=args.workers, horizon=args.horizon,
+                        model=model, new_days=args.new_days)
+    with open(state_path, "wb") as f:
+        model.save(f)
+    np.savez(args.out, **result)
+    locations, items = result["suggested_qty"].shape
+    print(f"Planned {locations} locations x {items} items in "
+          f"{time.perf_counter() - start:.2f} s -> {args.out}")
+
+
+def replicate_send(log, snapshot, address, args):
+    if address is not None:
+        ship(log, address, args.store, poll=args.poll, follow=not args.once,
+             snapshot=snapshot)
+        return
+    state_path = os.path.join(args.data_dir, "replicate.offset")
+    offset = 0
+    if os.path.exists(state_path):
+        with open(state_path) as f:
+            offset = int(f.read())
+    while True:
+        offset = ship_to_dir(log, args.dir, args.store, offset, snapshot)
+        with open(state_path, "w") as f:
+            f.write(str(offset))
+        if args.once:
+            break
+        time.sleep(args.poll)
+
+
+def replicate(args):
+    address = None
+    if args.address:
+        host, _, port = args.address.rpartition(":")
+        address = (host or "127.0.0.1", int(port))
+    if args.role == "send":
+        if not args.store:
+            raise SystemExit("replicate send needs --store")
+        # The store's own process owns its data dir: ship from a read-only
+        # view of the log and the snapshots it writes, never write either.
+        log = TransactionLog(os.path.join(args.data_dir, LOG_NAME),
+                             readonly=True)
+        snapshot = SnapshotWatch(os.path.join(args.data_dir, SNAPSHOT_NAME))
+        try:
+            replicate_send(log, snapshot, address, args)
+        finally:
+            log.close()
+    elif args.address:
+        server = ReplicationServer(address, args.root, on_apply=lambda s, o:
+                                   print(f"{s}: applied through {o}"))
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+    else:
+        replicas = {}
+        try:
+            while True:
+                stores = os.listdir(args.dir) if os.path.isdir(args.dir) else []
+                for store in sorted(stores):
+                    if store not in replicas:
+                        replicas[store] = Replica(args.root, store)
+                    apply_from_dir(args.dir, replicas[store])
+                if args.once:
+                    break
+                time.sleep(args.poll)
+        finally:
+            for replica in replicas.values():
+                replica.close()
+
+
+def run(argv=None):
+    args = parse_args(argv)
+    os.makedirs(args.data_dir, exist_ok=True)
+    if args.command == "replicate":
+        # Runs beside the store's own process, so no recovery or snapshots.
+        try:
+            replicate(args)
+        except KeyboardInterrupt:
+            pass
+        return None, None
+    ledger, log, stats = recover(args.data_dir)
     print("Invyntra dev environment OK.")
+    print(f"Loaded snapshot at record {stats['snapshot_seq']}, replayed "
+          f"{stats['replayed']} log records in {stats['elapsed_ms']:.1f} ms "
+          f"({len(ledger)} items).")
+    snapshotter = Snapshotter(args.data_dir)
+    if stats["replayed"]:
+        # Fold the replayed tail into a fresh snapshot for the next start.
+        snapshotter.snapshot(ledger, log)
+    snapshotter.watch(ledger, log)
+    if args.command == "listen":
+        listen(ledger, log, snapshotter, args.queue_size, args.fixtures,
+               args.wake, args.data_dir)
+    elif args.command == "ingest":
+        ingest_sales(ledger, log, snapshotter, args)
+    elif args.command == "plan":
+        plan_run(args)
+    snapshotter.close()
+    return ledger, log
 
 if __name__ == "__main__":
     run()
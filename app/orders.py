@@ -0,0 +1,119 @@
+import numpy as np
+
+
+def delivery_offsets(delivery_days, weekday):
+    # delivery_days is (vendors x 7) bool, Monday first. Returns days until
+    # the next delivery and the gap to the one after it, per vendor.
+    days = np.asarray(delivery_days, dtype=bool)
+    if not days.any(axis=1).all():
+        raise ValueError("every vendor needs at least one delivery day")
+    ahead = np.arange(1, 15)
+    open_ = days[:, (weekday + ahead) % 7]
+    first = ahead[np.argmax(open_, axis=1)]
+    later = open_ & (ahead > first[:, None])
+    second = ahead[np.argmax(later, axis=1)]
+    return first, second - first
+
+
+def _unit_price(qty, break_qty, break_price):
+    # qty is (locations x items [x candidates]). The price is that of the
+    # highest tier whose threshold qty reaches; tiers are sorted ascending
+    # and padded with +inf thresholds.
+    extra = (1,) * (qty.ndim - 2)
+    items, tiers = break_qty.shape
+    thresholds = break_qty.reshape((items,) + extra + (tiers,))
+    tier = np.maximum((qty[..., None] >= thresholds).sum(axis=-1) - 1, 0)
+    return break_price[np.arange(items).reshape((items,) + extra), tier]
+
+
+def optimize_orders(need, vendor, case_pack, break_qty, break_price,
+                    vendor_minimum, delivery_days, weekday=0,
+                    daily_usage=None, holding_rate=0.02, rounds=8):
+    # need and daily_usage are (locations x items); vendor and case_pack
+    # are per item; break_qty/break_price are (items x tiers) with the
+    # first threshold 0. Every step is an array operation over all lines
+    # of all purchase orders at once.
+    need = np.asarray(need, dtype=np.float64)
+    locations = need.shape[0]
+    vendor = np.asarray(vendor, dtype=np.intp)
+    pack = np.asarray(case_pack, dtype=np.float64)
+    bq = np.asarray(break_qty, dtype=np.float64)
+    bp = np.asarray(break_price, dtype=np.float64)
+    minimum = np.asarray(vendor_minimum, dtype=np.float64)
+    vendors = len(minimum)
+
+    first, gap = delivery_offsets(delivery_days, weekday)
+    usage = np.zeros_like(need) if daily_usage is None else \
+        np.asarray(daily_usage, dtype=np.float64)
+    # Suggested quantities assume daily review; stretch them to the next
+    # delivery after this one.
+    need = need + usage * (gap[vendor] - 1)
+    need[need < 0] = 0.0
+
+    # Candidate quantities: the case-rounded need and every price break
+    # above it; pick the cheapest including a holding charge on overage.
+    base = np.ceil(need / pack) * pack
+    breaks = np.where(np.isfinite(bq), np.ceil(bq / pack[:, None]), 0.0) \
+        * pack[:, None]
+    candidates = np.maximum(base[..., None], breaks)
+    price = _unit_price(candidates, bq, bp)
+    cost = candidates * price \
+        + holding_rate * price * (candidates - need[..., None])
+    qty = np.take_along_axis(candidates, np.argmin(cost, axis=-1)[..., None],
+                             axis=-1)[..., 0]
+    qty[need <= 0] = 0.0
+
+    # Vendor minimums per (location, vendor) order: top up short orders
+    # in whole cases, spread over their lines by usage (or need).
+    group = np.arange(locations)[:, None] * vendors + vendor
+    group_min = np.tile(minimum, locations)
+    weight = np.where(usage > 0, usage, need)
+    for _ in range(rounds):
+        price = _unit_price(qty, bq, bp)
+        value = np.bincount(group.ravel(), (qty * price).ravel(),
+                            minlength=locations * vendors)
+        short = (value > 0) & (value < group_min)
+        if not short.any():
+            break
+        live = (qty > 0) & short[group]
+        w = np.where(live, weight, 0.0)
+        totals = np.bincount(group.ravel(), w.ravel(),
+                             minlength=locations * vendors)
+        share = np.divide(w, totals[group], out=np.zeros_like(w),
+                          where=totals[group] > 0)
+        missing = (group_min - value)[group]
+        qty = qty + np.ceil(share * missing / (pack * price)) * pack
+
+    price = _unit_price(qty, bq, bp)
+    value = np.bincount(group.ravel(), (qty * price).ravel(),
+                        minlength=locations * vendors)
+    return {
+        "qty": qty,
+        "unit_price": price,
+        "line_cost": qty * price,
+        "order_value": value.reshape(locations, vendors),
+        "meets_minimum": ((value == 0) | (value >= group_min)).reshape(
+            locations, vendors),
+        "delivery_in_days": first[vendor],
+    }
+
+
+def purchase_orders(result, vendor, item_names=None):
+    # One order per (location, vendor) with at least one line.
+    qty = result["qty"]
+    vendor = np.asarray(vendor)
+    orders = []
+    for location, vendor_id in zip(*np.nonzero(result["order_value"])):
+        lines = np.flatnonzero((vendor == vendor_id) & (qty[location] > 0))
+        orders.append({
+            "location": int(location),
+            "vendor": int(vendor_id),
+            "delivery_in_days": int(result["delivery_in_days"][lines[0]]),
+            "total": float(result["order_value"][location, vendor_id]),
+            "lines": [{
+                "item": item_names[i] if item_names else int(i),
+                "qty": float(qty[location, i]),
+                "unit_price": float(result["unit_price"][location, i]),
+            } for i in lines],
+        })
+    return orders
@@ -0,0 +1,166 @@
+from collections import defaultdict
+
+from app.ledger import normalize
+
+VOWELS = set("aeiou")
+FRONT = set("eiy")
+_SILENT_START = ("kn", "gn", "pn", "wr", "ps")
+
+
+def _word_keys(word):
+    # Metaphone-style consonant skeleton. Returns (primary, alternate);
+    # the alternate differs only where English spelling is ambiguous.
+    word = "".join(c for c in word if c.isalpha())
+    if not word:
+        return "", ""
+    if word.startswith(_SILENT_START):
+        word = word[1:]
+    elif word.startswith("x"):
+        word = "s" + word[1:]
+    elif word.startswith("wh"):
+        word = "w" + word[2:]
+    primary, alternate = [], []
+
+    def emit(p, a=None):
+        primary.append(p)
+        alternate.append(p if a is None else a)
+
+    n = len(word)
+    i = 0
+    while i < n:
+        c = word[i]
+        nxt = word[i + 1] if i + 1 < n else ""
+        prev = word[i - 1] if i else ""
+        step = 1
+        if c in VOWELS:
+            if i == 0:
+                emit("A")
+        elif c == "b":
+            if not (prev == "m" and i == n - 1):
+                emit("P")
+        elif c == "c":
+            if nxt == "h":
+                emit("X", "K")
+                step = 2
+            elif nxt == "k":
+                emit("K")
+                step = 2
+            elif nxt in FRONT:
+                emit("S")
+            else:
+                emit("K")
+        elif c == "d":
+            if nxt == "g" and word[i + 2:i + 3] in FRONT:
+                emit("J")
+                step = 3
+            else:
+                emit("T")
+        elif c == "g":
+            if nxt == "h":
+                if i == 0:
+                    emit("K")
+                else:
+                    emit("", "F")
+                step = 2
+            elif nxt == "n" and i + 2 >= n:
+                step = 2
+                emit("N")
+            elif nxt in FRONT:
+                emit("J", "K")
+            else:
+                emit("K")
+        elif c == "h":
+            if nxt in VOWELS and prev not in set("cgpst"):
+                emit("H")
+        elif c == "k":
+            if prev != "c":
+                emit("K")
+        elif c == "p":
+            if nxt == "h":
+                emit("F")
+                step = 2
+            else:
+                emit("P")
+        elif c == "q":
+            emit("K")
+        elif c == "s":
+            if nxt == "h":
+                emit("X")
+                step = 2
+            elif word[i:i + 3] in ("sio", "sia"):
+                emit("X", "S")
+            else:
+                emit("S")
+        elif c == "t":
+            if nxt == "h":
+                emit("0", "T")
+                step = 2
+            elif word[i:i + 3] in ("tio", "tia"):
+                emit("X")
+            else:
+                emit("T")
+        elif c == "v":
+            emit("F")
+        elif c in "wy":
+            if nxt in VOWELS:
+                emit(c.upper())
+        elif c == "x":
+            emit("KS")
+        elif c == "z":
+            emit("S")
+        else:
+            emit(c.upper())
+        i += step
+    return _collapse(primary), _collapse(alternate)
+
+
+def _collapse(codes):
+    out = []
+    for code in "".join(codes):
+        if not out or out[-1] != code:
+            out.append(code)
+    return "".join(out)
+
+
+def phonetic_keys(text):
+    words = [_word_keys(w) for w in normalize(text).split()]
+    primary = " ".join(p for p, _ in words if p)
+    alternate = " ".join(a for _, a in words if a)
+    return {primary, alternate} - {""}
+
+
+class PhoneticIndex:
+    # Sound-alike key -> item ids. Kept current through ledger catalog
+    # events, so a lookup is one hash probe per key.
+
+    def __init__(self, ledger):
+        self.ledger = ledger
+        self.buckets = defaultdict(set)
+        for item_id, name in enumerate(ledger.names):
+            if name:
+                self._add(item_id, name)
+        ledger.subscribe_catalog(self._on_catalog)
+
+    def _add(self, item_id, name):
+        for key in phonetic_keys(name):
+            self.buckets[key].add(item_id)
+
+    def _remove(self, item_id, name):
+        for key in phonetic_keys(name):
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket.discard(item_id)
+                if not bucket:
+                    del self.buckets[key]
+
+    def _on_catalog(self, item_id, old, new):
+        if old:
+            self._remove(item_id, old)
+        if new:
+            self._add(item_id, new)
+
+    def lookup(self, text):
+        found = set()
+        for key in phonetic_keys(text):
+            found |= self.buckets.get(key, set())
+        return sorted(found)
@@ -0,0 +1,122 @@
+import asyncio
+import inspect
+import time
+
+
+class Stage:
+    def __init__(self, name, handler, maxsize=64):
+        self.name = name
+        self.handler = handler
+        self.is_async = inspect.iscoroutinefunction(handler) or \
+            inspect.iscoroutinefunction(getattr(handler, "__call__", None))
+        self.queue = asyncio.Queue(maxsize)
+        self.processed = 0
+        self.errors = 0
+        self.last_error = None
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    @property
+    def depth(self):
+        return self.queue.qsize()
+
+    def stats(self):
+        avg = self.total_latency / self.processed if self.processed else 0.0
+        return {
+            "stage": self.name,
+            "depth": self.depth,
+            "maxsize": self.queue.maxsize,
+            "processed": self.processed,
+            "errors": self.errors,
+            "avg_latency_ms": avg * 1000,
+            "max_latency_ms": self.max_latency * 1000,
+        }
+
+    async def work(self, downstream):
+        while True:
+            enqueued, item = await self.queue.get()
+            try:
+                if self.is_async:
+                    out = await self.handler(item)
+                else:
+                    # Blocking handlers (speech engines, SQLite) run in a
+                    # worker thread so the loop keeps reading the mic and
+                    # feeding the other stages.
+                    out = await asyncio.to_thread(self.handler, item)
+                    if inspect.isawaitable(out):
+                        out = await out
+            except Exception as exc:
+                self.errors += 1
+                self.last_error = exc
+                out = None
+            # Latency covers queue wait plus handling, i.e. what a cook feels.
+            latency = time.perf_counter() - enqueued
+            self.processed += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            if out is not None and downstream is not None:
+                # Blocking put: a slow stage pushes back on the one before it.
+                for value in out if isinstance(out, list) else [out]:
+                    await downstream.queue.put((time.perf_counter(), value))
+            self.queue.task_done()
+
+
+class Pipeline:
+    # audio intake -> [wake gate] -> transcription -> intent parsing ->
+    # ledger update. Intake never waits: when the first stage falls behind,
+    # the oldest buffered chunk is dropped instead of stalling the
+    # microphone reader.
+
+    def __init__(self, transcribe, parse, apply, maxsize=64, gate=None):
+        self.stages = [
+            Stage("transcribe", transcribe, maxsize),
+            Stage("parse", parse, maxsize),
+            Stage("apply", apply, maxsize),
+        ]
+        if gate is not None:
+            self.stages.insert(0, Stage("wake", gate, maxsize))
+        self.chunks_read = 0
+        self.chunks_dropped = 0
+
+    def offer(self, chunk):
+        queue = self.stages[0].queue
+        self.chunks_read += 1
+        if queue.full():
+            queue.get_nowait()
+            queue.task_done()
+            self.chunks_dropped += 1
+        queue.put_nowait((time.perf_counter(), chunk))
+
+    def stats(self):
+        intake = {
+            "stage": "intake",
+            "read": self.chunks_read,
+            "dropped": self.chunks_dropped,
+        }
+        return [intake] + [stage.stats() for stage in self.stages]
+
+    async def run(self, source):
+        workers = []
+        for stage, downstream in zip(self.stages, self.stages[1:] + [None]):
+            workers.append(asyncio.create_task(stage.work(downstream)))
+        try:
+            async for chunk in source:
+                self.offer(chunk)
+                await asyncio.sleep(0)
+            for stage in self.stages:
+                await stage.queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        return self.stats()
+
+
+async def read_chunks(read):
+    # Blocking reads run in a thread so the event loop keeps processing.
+    loop = asyncio.get_running_loop()
+    while True:
+        chunk = await loop.run_in_executor(None, read)
+        if not chunk:
+            return
+        yield chunk
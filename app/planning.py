@@ -0,0 +1,135 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from app.forecast import Smoother
+from app.reorder import reorder_plan
+
+OUTPUTS = ("forecast", "reorder_point", "suggested_qty")
+
+
+def _share(array):
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    view = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+    view[...] = array
+    return shm, view, (shm.name, array.shape, array.dtype.str)
+
+
+def _attach(spec):
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _plan_shard(specs, lo, hi, options):
+    # Runs in a worker: reads its location slice straight from shared
+    # memory and writes results back the same way; nothing is pickled but
+    # the segment names and a few scalars. A fitted model's state is
+    # rolled forward with update() on the new days only; an empty one is
+    # fitted on the whole history (first run).
+    handles, arrays = [], {}
+    try:
+        for key, spec in specs.items():
+            shm, arrays[key] = _attach(spec)
+            handles.append(shm)
+        usage = arrays["usage"][:, lo:hi]
+        model = Smoother(options["alpha"], options["beta"],
+                         options["gamma"], options["season"])
+        if options["t"] is None:
+            model.fit(usage)
+        else:
+            model.level = arrays["level"][lo:hi].copy()
+            model.trend = arrays["trend"][lo:hi].copy()
+            if model.season:
+                model.seasonal = arrays["seasonal"][:, lo:hi].copy()
+            model.t = options["t"]
+            for row in usage[len(usage) - options["new_days"]:]:
+                model.update(row)
+        arrays["level"][lo:hi] = model.level
+        arrays["trend"][lo:hi] = model.trend
+        if model.season:
+            arrays["seasonal"][:, lo:hi] = model.seasonal
+        daily = model.forecast(options["horizon"]).mean(axis=0)
+        plan = reorder_plan(usage, arrays["on_hand"][lo:hi],
+                            arrays["lead_days"][lo:hi],
+                            service_level=options["service_level"],
+                            case_pack=arrays["case_pack"][lo:hi],
+                            forecast=daily)
+        arrays["forecast"][lo:hi] = daily
+        arrays["reorder_point"][lo:hi] = plan["reorder_point"]
+        arrays["suggested_qty"][lo:hi] = plan["suggested_qty"]
+        del usage, model, plan, arrays
+        return hi - lo
+    finally:
+        for shm in handles:
+            shm.close()
+
+
+def plan_fleet(usage, on_hand, lead_days, case_pack=1.0, workers=None,
+               horizon=7, alpha=0.3, beta=0.1, gamma=0.2, season=7,
+               service_level=0.95, model=None, new_days=1):
+    # usage is (days x locations x items). Locations are split into one
+    # contiguous shard per worker. With a fitted `model` (e.g. last
+    # night's Smoother.load), only the last `new_days` of usage are fed to
+    # it and the rest serves as the variability window; an unfitted one is
+    # fitted on all of usage. Either way `model` ends up holding the new
+    # state, ready for Smoother.save.
+    usage = np.ascontiguousarray(usage, dtype=np.float64)
+    days, locations, items = usage.shape
+    if model is None:
+        model = Smoother(alpha, beta, gamma, season)
+    fitted = model.level is not None
+    if not fitted and model.season and days < model.season:
+        model.gamma, model.season = None, 0
+    if fitted and model.level.shape != (locations, items):
+        raise ValueError(f"model state is {model.level.shape}, usage has "
+                         f"{(locations, items)}")
+    new_days = min(new_days, days)
+    inputs = {
+        "usage": usage,
+        "on_hand": np.ascontiguousarray(on_hand, dtype=np.float64),
+        # Scalars, per-item or per-location-and-item values all become
+        # (locations x items) so each shard slices its own rows.
+        "lead_days": np.broadcast_to(
+            np.asarray(lead_days, dtype=np.float64),
+            (locations, items)).copy(),
+        "case_pack": np.broadcast_to(
+            np.asarray(case_pack, dtype=np.float64),
+            (locations, items)).copy(),
+        "level": model.level if fitted else np.zeros((locations, items)),
+        "trend": model.trend if fitted else np.zeros((locations, items)),
+        "seasonal": model.seasonal if fitted and model.season
+        else np.zeros((model.season, locations, items)),
+    }
+    for key in OUTPUTS:
+        inputs[key] = np.zeros((locations, items))
+    options = {"horizon": horizon, "alpha": model.alpha, "beta": model.beta,
+               "gamma": model.gamma, "season": model.season,
+               "t": model.t if fitted else None, "new_days": new_days,
+               "service_level": service_level}
+    workers = max(1, min(workers or os.cpu_count() or 1, locations))
+    bounds = np.linspace(0, locations, workers + 1).astype(int)
+    segments, views, specs = [], {}, {}
+    try:
+        for key, array in inputs.items():
+            shm, views[key], specs[key] = _share(
+                np.ascontiguousarray(array, dtype=np.float64))
+            segments.append(shm)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_plan_shard, specs, lo, hi, options)
+                       for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+            for future in futures:
+                future.result()
+        model.level = views["level"].copy()
+        model.trend = views["trend"].copy()
+        if model.season:
+            model.seasonal = views["seasonal"].copy()
+        model.t = model.t + new_days if fitted else days
+        return {key: views[key].copy() for key in OUTPUTS}
+    finally:
+        views.clear()
+        for shm in segments:
+            shm.close()
+            shm.unlink()
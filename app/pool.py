@@ -0,0 +1,130 @@
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+def connect(path, readonly=False):
+    if readonly:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True,
+                               check_same_thread=False,
+                               isolation_level=None)
+    else:
+        conn = sqlite3.connect(path, check_same_thread=False,
+                               isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+class PoolStats:
+    def __init__(self):
+        self.acquired = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def add(self, wait):
+        self.acquired += 1
+        if wait > 0.001:
+            self.waited += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def as_dict(self):
+        avg = self.total_wait / self.acquired if self.acquired else 0.0
+        return {
+            "acquired": self.acquired,
+            "waited": self.waited,
+            "avg_wait_ms": avg * 1000,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+
+class ConnectionPool:
+    # One writer connection behind a lock and a fixed set of read-only
+    # connections handed out to threads. A thread that already holds a
+    # reader gets the same one back on nested use, so a request never
+    # needs two. Both sides record how long callers waited.
+
+    def __init__(self, path, readers=4, timeout=10.0):
+        self.path = path
+        self.timeout = timeout
+        self._writer = connect(path)
+        self._write_lock = threading.RLock()
+        self._idle = queue.LifoQueue()
+        self._readers = []
+        self._local = threading.local()
+        self.read_stats = PoolStats()
+        self.write_stats = PoolStats()
+        self._stats_lock = threading.Lock()
+        self._opened = False
+        self._size = readers
+
+    def open_readers(self):
+        # Read-only connections need the database (and its WAL) to exist,
+        # so they are opened after the schema is in place.
+        if self._opened:
+            return
+        for _ in range(self._size):
+            conn = connect(self.path, readonly=True)
+            self._readers.append(conn)
+            self._idle.put(conn)
+        self._opened = True
+
+    def _record(self, stats, started):
+        with self._stats_lock:
+            stats.add(time.perf_counter() - started)
+
+    @contextmanager
+    def writer(self):
+        started = time.perf_counter()
+        if not self._write_lock.acquire(timeout=self.timeout):
+            raise TimeoutError("timed out waiting for the writer connection")
+        self._record(self.write_stats, started)
+        try:
+            yield self._writer
+        finally:
+            self._write_lock.release()
+
+    @contextmanager
+    def reader(self):
+        self.open_readers()
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+        started = time.perf_counter()
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError("timed out waiting for a read connection")
+        self._record(self.read_stats, started)
+        self._local.conn, self._local.depth = conn, 0
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._idle.put(conn)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "readers": len(self._readers),
+                "idle_readers": self._idle.qsize(),
+                "read": self.read_stats.as_dict(),
+                "write": self.write_stats.as_dict(),
+            }
+
+    def close(self):
+        with self._write_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers = []
+            self._writer.close()
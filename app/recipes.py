@@ -0,0 +1,159 @@
+import json
+
+import numpy as np
+
+from app.ledger import normalize
+
+
+class RecipeBook:
+    # Recipes are authored per dish as {ingredient item id: qty in the
+    # ingredient's stock unit} plus {prep dish id: portions}. Each dish is
+    # flattened once into raw ingredients and the flat vectors compiled
+    # into a CSR matrix (dishes x ingredients), so depleting a batch of
+    # sales is one sparse mat-vec product with no recipe-tree walk.
+
+    def __init__(self, ledger):
+        self.ledger = ledger
+        self.dishes = []
+        self.dish_ids = {}
+        self.recipes = []
+        self.preps = []
+        self.used_by = []
+        self._flat = []
+        self._csr = None
+
+    def __len__(self):
+        return len(self.dishes)
+
+    def add_dish(self, name):
+        key = normalize(name)
+        if key in self.dish_ids:
+            raise ValueError(f"duplicate dish: {name!r}")
+        dish_id = len(self.dishes)
+        self.dishes.append(key)
+        self.dish_ids[key] = dish_id
+        self.recipes.append({})
+        self.preps.append({})
+        self.used_by.append(set())
+        self._flat.append(None)
+        self._csr = None
+        return dish_id
+
+    def dish_id(self, name):
+        return self.dish_ids[normalize(name)]
+
+    def set_component(self, dish_id, item_id, qty):
+        if not 0 <= item_id < len(self.ledger):
+            raise IndexError(f"unknown item id: {item_id}")
+        if qty:
+            self.recipes[dish_id][item_id] = qty
+        else:
+            self.recipes[dish_id].pop(item_id, None)
+        self._invalidate(dish_id)
+
+    def set_prep(self, dish_id, prep_id, qty):
+        # `qty` portions of prep dish `prep_id` go into one `dish_id`.
+        if not 0 <= prep_id < len(self.dishes):
+            raise IndexError(f"unknown dish id: {prep_id}")
+        if prep_id == dish_id or prep_id in self.dependents(dish_id):
+            raise ValueError("recipe cycle: prep already uses this dish")
+        if qty:
+            self.preps[dish_id][prep_id] = qty
+            self.used_by[prep_id].add(dish_id)
+        else:
+            self.preps[dish_id].pop(prep_id, None)
+            self.used_by[prep_id].discard(dish_id)
+        self._invalidate(dish_id)
+
+    def dependents(self, dish_id):
+        # Every dish that uses `dish_id` directly or through other preps.
+        seen, stack = set(), [dish_id]
+        while stack:
+            for parent in self.used_by[stack.pop()]:
+                if parent not in seen:
+                    seen.add(parent)
+                    stack.append(parent)
+        return seen
+
+    def _invalidate(self, dish_id):
+        self._flat[dish_id] = None
+        for parent in self.dependents(dish_id):
+            self._flat[parent] = None
+        self._csr = None
+
+    def flat(self, dish_id):
+        # Raw ingredients for one portion, as {item id: qty}. Stale vectors
+        # are rebuilt children-first, so each is computed once per edit.
+        cached = self._flat[dish_id]
+        if cached is not None:
+            return cached
+        order, stack = [], [(dish_id, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if self._flat[node] is not None:
+                continue
+            if expanded:
+                order.append(node)
+                continue
+            stack.append((node, True))
+            stack.extend((p, False) for p in self.preps[node]
+                         if self._flat[p] is None)
+        for node in order:
+            if self._flat[node] is not None:
+                continue
+            flat = dict(self.recipes[node])
+            for prep, portions in self.preps[node].items():
+                for item, qty in self._flat[prep].items():
+                    flat[item] = flat.get(item, 0.0) + portions * qty
+            self._flat[node] = flat
+        return self._flat[dish_id]
+
+    def matrix(self):
+        if self._csr is None:
+            flats = [self.flat(d) for d in range(len(self.dishes))]
+            lengths = [len(f) for f in flats]
+            indptr = np.zeros(len(flats) + 1, dtype=np.intp)
+            np.cumsum(lengths, out=indptr[1:])
+            indices = np.fromiter(
+                (i for f in flats for i in f), np.intp, indptr[-1])
+            data = np.fromiter(
+                (q for f in flats for q in f.values()), np.float64,
+                indptr[-1])
+            self._csr = (indptr, indices, data)
+        return self._csr
+
+    def sales_vector(self, dish_ids, counts):
+        return np.bincount(np.asarray(dish_ids, dtype=np.intp),
+                           weights=np.asarray(counts, dtype=np.float64),
+                           minlength=len(self.dishes))
+
+    def depletion(self, sales):
+        # usage = sales @ BOM, computed as a weighted bincount over the CSR
+        # entries: each stored entry contributes qty * dishes sold.
+        indptr, indices, data = self.matrix()
+        weights = data * np.repeat(np.asarray(sales, dtype=np.float64),
+                                   np.diff(indptr))
+        return np.bincount(indices, weights=weights,
+                           minlength=len(self.ledger))
+
+    def deplete(self, log, sales, mark=None):
+        usage = self.depletion(sales)
+        ids = np.flatnonzero(usage)
+        log.record_many(self.ledger, ids, -usage[ids], mark=mark)
+        return usage
+
+
+def load_recipes(ledger, path):
+    # {"dish": {"items": {"item name": qty}, "preps": {"dish": portions}}}
+    with open(path) as f:
+        spec = json.load(f)
+    book = RecipeBook(ledger)
+    for name in spec:
+        book.add_dish(name)
+    for name, recipe in spec.items():
+        dish = book.dish_id(name)
+        for item, qty in recipe.get("items", {}).items():
+            book.set_component(dish, ledger.item_id(item), qty)
+        for prep, qty in recipe.get("preps", {}).items():
+            book.set_prep(dish, book.dish_id(prep), qty)
+    return book
@@ -0,0 +1,58 @@
+import math
+
+import numpy as np
+
+
+def service_z(level):
+    # Inverse standard normal CDF by bisection on erf; only called once
+    # per run, so the scalar loop does not matter.
+    if not 0.5 <= level < 1:
+        raise ValueError("service level must be in [0.5, 1)")
+    lo, hi = 0.0, 10.0
+    for _ in range(60):
+        mid = (lo + hi) / 2
+        if 0.5 * (1 + math.erf(mid / math.sqrt(2))) < level:
+            lo = mid
+        else:
+            hi = mid
+    return (lo + hi) / 2
+
+
+def stack_ledgers(ledgers):
+    # One row per location; the ledgers must share one item catalog.
+    n = len(ledgers[0])
+    if any(len(ledger) != n for ledger in ledgers):
+        raise ValueError("ledgers have different catalogs")
+    return (np.vstack([ledger.qty for ledger in ledgers]),
+            np.vstack([ledger.par for ledger in ledgers]))
+
+
+def reorder_plan(usage, on_hand, lead_days, review_days=1.0,
+                 service_level=0.95, on_order=0.0, case_pack=1.0,
+                 forecast=None):
+    # usage is (days x locations x items) daily usage history; on_hand and
+    # on_order are (locations x items). lead_days, review_days and
+    # case_pack broadcast against (locations x items). A daily demand
+    # forecast, when given, replaces the historical mean.
+    usage = np.asarray(usage, dtype=np.float64)
+    mean = usage.mean(axis=0) if forecast is None else np.maximum(
+        np.asarray(forecast, dtype=np.float64), 0.0)
+    std = usage.std(axis=0, ddof=1) if len(usage) > 1 else np.zeros_like(mean)
+    lead = np.asarray(lead_days, dtype=np.float64)
+    review = np.asarray(review_days, dtype=np.float64)
+    z = service_z(service_level)
+    safety = z * std * np.sqrt(lead + review)
+    reorder_point = mean * lead + safety
+    target = mean * (lead + review) + safety
+    position = np.asarray(on_hand) + np.asarray(on_order)
+    need = np.maximum(target - position, 0.0)
+    need[position > reorder_point] = 0.0
+    pack = np.asarray(case_pack, dtype=np.float64)
+    suggested = np.ceil(need / pack) * pack
+    return {
+        "mean_daily_usage": mean,
+        "safety_stock": safety,
+        "reorder_point": reorder_point,
+        "order_up_to": target,
+        "suggested_qty": suggested,
+    }
@@ -0,0 +1,232 @@
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+import numpy as np
+
+from app.snapshot import SNAPSHOT_NAME, load_snapshot, recover, snapshot_seq
+from app.txlog import RECORD
+
+HELLO = b"INVREP01"
+U16 = struct.Struct("<H")
+U32 = struct.Struct("<I")
+U64 = struct.Struct("<Q")
+# Frame count that announces a snapshot (U64 length + file) instead of
+# records; names, units, par and opening quantities only live there.
+SNAPSHOT_FRAME = 0xFFFFFFFF
+SEGMENT_SUFFIX = ".seg"
+
+
+class Replica:
+    # Central-office copy of one store: a mirror of the store's log plus the
+    # ledger rebuilt from it. The offset is simply the mirror's length.
+
+    def __init__(self, root, store):
+        self.store = store
+        self.data_dir = os.path.join(root, store)
+        os.makedirs(self.data_dir, exist_ok=True)
+        self.ledger, self.log, _ = recover(self.data_dir)
+        self.lock = threading.Lock()
+
+    @property
+    def offset(self):
+        return len(self.log)
+
+    def apply(self, recs):
+        # Appends records from the tracked offset on and applies them as one
+        # batch; records the replica already has are skipped.
+        with self.lock:
+            recs = recs[recs["seq"] >= self.offset]
+            if len(recs):
+                start = self.offset
+                self.log.append_records(recs)
+                self.log.replay(self.ledger, start=start)
+            return self.offset
+
+    def apply_snapshot(self, data):
+        # Installs the store's snapshot and rebuilds the ledger from it plus
+        # the mirrored log. One ahead of the mirror waits for its records.
+        with self.lock:
+            seq = snapshot_seq(data)
+            if seq > self.offset:
+                return False
+            path = os.path.join(self.data_dir, SNAPSHOT_NAME)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    if f.read() == data:
+                        return True
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + ".tmp", path)
+            ledger, seq = load_snapshot(path)
+            self.log.replay(ledger, start=seq)
+            self.ledger = ledger
+            return True
+
+    def close(self):
+        self.log.close()
+
+
+class SnapshotWatch:
+    # Sender side of snapshot shipping: hands out the store's snapshot file
+    # each time it has been replaced, once the log records it covers have
+    # been shipped. The file is only read, never written.
+
+    def __init__(self, path):
+        self.path = path
+        self._seen = None
+
+    def take(self, offset):
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return None
+        with f:
+            st = os.fstat(f.fileno())
+            seen = (st.st_ino, st.st_mtime_ns, st.st_size)
+            if seen == self._seen:
+                return None
+            data = f.read()
+        if snapshot_seq(data) > offset:
+            return None
+        self._seen = seen
+        return data
+
+
+def _recv_exact(sock, n):
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("peer closed the connection")
+        buf += chunk
+    return bytes(buf)
+
+
+def ship(log, address, store, batch=4096, poll=0.5, follow=True,
+         snapshot=None):
+    # Streams the local log to a receiver, starting at the offset it asks
+    # for and sending at most `batch` records per frame. The log is
+    # re-measured each poll since another process usually writes it.
+    # With a SnapshotWatch the store's catalog follows the records.
+    with socket.create_connection(address) as sock:
+        name = store.encode()
+        sock.sendall(HELLO + U16.pack(len(name)) + name)
+        offset = U64.unpack(_recv_exact(sock, U64.size))[0]
+        while True:
+            if offset < log.refresh():
+                recs = log.records(offset)[:batch]
+                sock.sendall(U32.pack(len(recs)) + recs.tobytes())
+                offset = U64.unpack(_recv_exact(sock, U64.size))[0]
+                continue
+            data = snapshot.take(offset) if snapshot is not None else None
+            if data is not None:
+                sock.sendall(U32.pack(SNAPSHOT_FRAME) + U64.pack(len(data))
+                             + data)
+                offset = U64.unpack(_recv_exact(sock, U64.size))[0]
+                continue
+            if not follow:
+                sock.sendall(U32.pack(0))
+                return offset
+            time.sleep(poll)
+
+
+class ReplicationServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, root, on_apply=None):
+        self.root = root
+        self.replicas = {}
+        self.on_apply = on_apply
+        self._lock = threading.Lock()
+        super().__init__(address, _ReplicationHandler)
+
+    def replica(self, store):
+        with self._lock:
+            if store not in self.replicas:
+                self.replicas[store] = Replica(self.root, store)
+            return self.replicas[store]
+
+    def server_close(self):
+        super().server_close()
+        for replica in self.replicas.values():
+            replica.close()
+
+
+class _ReplicationHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        sock = self.request
+        if _recv_exact(sock, len(HELLO)) != HELLO:
+            return
+        size = U16.unpack(_recv_exact(sock, U16.size))[0]
+        store = _recv_exact(sock, size).decode()
+        if not store or os.sep in store or store.startswith("."):
+            return
+        replica = self.server.replica(store)
+        sock.sendall(U64.pack(replica.offset))
+        while True:
+            count = U32.unpack(_recv_exact(sock, U32.size))[0]
+            if count == 0:
+                return
+            if count == SNAPSHOT_FRAME:
+                size = U64.unpack(_recv_exact(sock, U64.size))[0]
+                replica.apply_snapshot(_recv_exact(sock, size))
+                offset = replica.offset
+            else:
+                raw = _recv_exact(sock, count * RECORD.itemsize)
+                offset = replica.apply(np.frombuffer(raw, dtype=RECORD))
+            if self.server.on_apply is not None:
+                self.server.on_apply(store, offset)
+            sock.sendall(U64.pack(offset))
+
+
+# Shared-directory transport: the store drops numbered segment files and
+# the receiver applies whichever part of them it has not seen yet. The
+# store's latest snapshot sits next to them and is replaced, not pruned.
+
+def _write_atomic(path, data):
+    with open(path + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+
+
+def ship_to_dir(log, shared_dir, store, offset, snapshot=None):
+    target = os.path.join(shared_dir, store)
+    if offset < log.refresh():
+        os.makedirs(target, exist_ok=True)
+        recs = log.records(offset)
+        _write_atomic(os.path.join(target, f"{offset:020d}{SEGMENT_SUFFIX}"),
+                      recs.tobytes())
+        offset += len(recs)
+    data = snapshot.take(offset) if snapshot is not None else None
+    if data is not None:
+        os.makedirs(target, exist_ok=True)
+        _write_atomic(os.path.join(target, SNAPSHOT_NAME), data)
+    return offset
+
+
+def apply_from_dir(shared_dir, replica, prune=True):
+    source = os.path.join(shared_dir, replica.store)
+    if not os.path.isdir(source):
+        return replica.offset
+    for name in sorted(os.listdir(source)):
+        if not name.endswith(SEGMENT_SUFFIX):
+            continue
+        path = os.path.join(source, name)
+        recs = np.fromfile(path, dtype=RECORD)
+        if len(recs) and int(recs["seq"][0]) > replica.offset:
+            break
+        replica.apply(recs)
+        if prune:
+            os.remove(path)
+    path = os.path.join(source, SNAPSHOT_NAME)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            replica.apply_snapshot(f.read())
+    return replica.offset
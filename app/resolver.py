@@ -0,0 +1,111 @@
+from collections import defaultdict
+
+import numpy as np
+
+from app.ledger import normalize
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b):
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+class ItemResolver:
+    # Character-trigram inverted index over the ledger catalog. A lookup
+    # only touches the posting lists of the query's trigrams, keeps the
+    # best few by Dice overlap, and runs edit distance on those alone.
+
+    def __init__(self, ledger, min_score=0.5, shortlist=8, phonetic=None,
+                 cache=None):
+        self.ledger = ledger
+        self.phonetic = phonetic
+        self.cache = cache
+        self.min_score = min_score
+        self.shortlist = shortlist
+        self.postings = defaultdict(list)
+        self.gram_counts = np.zeros(max(len(ledger), 1), dtype=np.int32)
+        for item_id, name in enumerate(ledger.names):
+            if name:
+                self._index(item_id, name)
+        ledger.subscribe_catalog(self._on_catalog)
+
+    def _index(self, item_id, name):
+        if item_id >= len(self.gram_counts):
+            grown = np.zeros(max(item_id + 1, 2 * len(self.gram_counts)),
+                             dtype=np.int32)
+            grown[:len(self.gram_counts)] = self.gram_counts
+            self.gram_counts = grown
+        grams = trigrams(name)
+        for gram in grams:
+            self.postings[gram].append(item_id)
+        self.gram_counts[item_id] = len(grams)
+
+    def _unindex(self, item_id, name):
+        for gram in trigrams(name):
+            self.postings[gram].remove(item_id)
+        self.gram_counts[item_id] = 0
+
+    def _on_catalog(self, item_id, old, new):
+        if self.cache is not None:
+            # Any name change can alter the best match for any query.
+            self.cache.clear()
+        if old:
+            self._unindex(item_id, old)
+        if new:
+            self._index(item_id, new)
+
+    def candidates(self, text):
+        query = trigrams(normalize(text))
+        lists = [self.postings[g] for g in query if self.postings.get(g)]
+        if not lists:
+            return []
+        shared = np.bincount(np.concatenate(lists),
+                             minlength=len(self.gram_counts))
+        ids = np.flatnonzero(shared)
+        dice = 2 * shared[ids] / (len(query) + self.gram_counts[ids])
+        if len(ids) > self.shortlist:
+            top = np.argpartition(dice, -self.shortlist)[-self.shortlist:]
+            ids, dice = ids[top], dice[top]
+        order = np.argsort(-dice, kind="stable")
+        return list(zip(ids[order].tolist(), dice[order].tolist()))
+
+    def match(self, text):
+        text = normalize(text)
+        ids = [item_id for item_id, _ in self.candidates(text)]
+        sounds_like = set()
+        if self.phonetic is not None:
+            sounds_like.update(self.phonetic.lookup(text))
+            ids.extend(sorted(sounds_like.difference(ids)))
+        scored = []
+        for item_id in ids:
+            name = self.ledger.names[item_id]
+            score = 1 - edit_distance(text, name) / max(len(text), len(name))
+            if item_id in sounds_like:
+                score = max(score, self.min_score)
+            if score >= self.min_score:
+                scored.append((item_id, score))
+        scored.sort(key=lambda pair: -pair[1])
+        return scored
+
+    def _resolve(self, text):
+        scored = self.match(text)
+        return scored[0][0] if scored else None
+
+    def resolve(self, text):
+        if self.cache is None:
+            return self._resolve(text)
+        key = normalize(text)
+        return self.cache.get_or_compute(key, lambda: self._resolve(key))
@@ -0,0 +1,164 @@
+import mmap
+import os
+import struct
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.ledger import Ledger
+from app.txlog import TransactionLog
+
+MAGIC = b"INVSNP\x00\x01"
+HEADER = struct.Struct("<8sQQQ")
+LOG_NAME = "stock.log"
+SNAPSHOT_NAME = "stock.snap"
+
+
+def _pad(n):
+    return -n % 8
+
+
+def write_snapshot(path, columns, seq):
+    # Layout: header | qty f8[n] | par f8[n] | unit u1[n] (8-aligned) | names
+    names, qty, par, unit = columns
+    blob = "\n".join(names).encode()
+    n = len(names)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, seq, n, len(blob)))
+        f.write(np.ascontiguousarray(qty, dtype="<f8").tobytes())
+        f.write(np.ascontiguousarray(par, dtype="<f8").tobytes())
+        f.write(np.ascontiguousarray(unit, dtype="u1").tobytes())
+        f.write(b"\x00" * _pad(n))
+        f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_snapshot(path):
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, seq, n, blob_len = HEADER.unpack_from(mm)
+    if magic != MAGIC:
+        raise ValueError(f"not a snapshot: {path}")
+    offset = HEADER.size
+    qty = np.frombuffer(mm, dtype="<f8", count=n, offset=offset)
+    offset += 8 * n
+    par = np.frombuffer(mm, dtype="<f8", count=n, offset=offset)
+    offset += 8 * n
+    unit = np.frombuffer(mm, dtype="u1", count=n, offset=offset)
+    offset += n + _pad(n)
+    blob = mm[offset:offset + blob_len].decode()
+    names = blob.split("\n") if n else []
+    return Ledger.from_columns(names, qty, par, unit), seq
+
+
+def snapshot_seq(data):
+    # Log position covered by a snapshot file's raw bytes.
+    magic, seq, _, _ = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a snapshot")
+    return seq
+
+
+def recover(data_dir):
+    # Latest snapshot plus only the log records written after it.
+    start = time.perf_counter()
+    snap_path = os.path.join(data_dir, SNAPSHOT_NAME)
+    log = TransactionLog(os.path.join(data_dir, LOG_NAME))
+    if os.path.exists(snap_path):
+        ledger, seq = load_snapshot(snap_path)
+        if seq > len(log):
+            # Snapshot is ahead of a truncated log: keep its catalog, which
+            # the log cannot rebuild, but take quantities from the log.
+            ledger.assign(range(len(ledger)), 0.0)
+            seq = 0
+    else:
+        ledger, seq = Ledger(), 0
+    replayed = log.replay(ledger, start=seq)
+    stats = {
+        "snapshot_seq": seq,
+        "replayed": replayed,
+        "elapsed_ms": (time.perf_counter() - start) * 1000,
+    }
+    return ledger, log, stats
+
+
+class Snapshotter:
+    # The column copy happens on the caller's thread so it is consistent
+    # with the log position; only the disk write runs in the background.
+
+    def __init__(self, data_dir, every_records=10_000, every_seconds=300.0):
+        self.path = os.path.join(data_dir, SNAPSHOT_NAME)
+        self.every_records = every_records
+        self.every_seconds = every_seconds
+        self.last_seq = 0
+        self.last_time = time.monotonic()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending = None
+        self.closed = False
+        self.catalog_dirty = False
+        self._batching = 0
+
+    def watch(self, ledger, log):
+        # Names and units are not in the log, so a catalog edit is made
+        # durable by writing a snapshot before the edit returns. Inside
+        # batch() edits only mark the catalog dirty.
+        def on_catalog(item_id, old, new):
+            if self.closed:
+                return
+            if self._batching:
+                self.catalog_dirty = True
+            else:
+                self.snapshot(ledger, log, wait=True)
+
+        ledger.subscribe_catalog(on_catalog)
+
+    @contextmanager
+    def batch(self, ledger, log):
+        # Bulk catalog edits (e.g. loading a price list) share one snapshot,
+        # written when the outermost batch ends.
+        self._batching += 1
+        try:
+            yield self
+        finally:
+            self._batching -= 1
+            if not self._batching and self.catalog_dirty and not self.closed:
+                self.snapshot(ledger, log, wait=True)
+
+    def due(self, log):
+        if self.catalog_dirty:
+            return True
+        behind = len(log) - self.last_seq
+        if behind <= 0:
+            return False
+        return (behind >= self.every_records
+                or time.monotonic() - self.last_time >= self.every_seconds)
+
+    def snapshot(self, ledger, log, wait=False):
+        if self._pending is not None and not self._pending.done():
+            if not wait:
+                return self._pending
+            self._pending.result()
+        seq = len(log)
+        columns = ledger.columns()
+        self.catalog_dirty = False
+        self.last_seq = seq
+        self.last_time = time.monotonic()
+        self._pending = self._executor.submit(
+            write_snapshot, self.path, columns, seq)
+        if wait:
+            self._pending.result()
+        return self._pending
+
+    def maybe_snapshot(self, ledger, log):
+        if self.due(log):
+            return self.snapshot(ledger, log)
+        return None
+
+    def close(self):
+        self.closed = True
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,115 @@
+import os
+import zlib
+from collections import namedtuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+
+Transcript = namedtuple("Transcript", "text final")
+
+
+class SpeechEngine:
+    # Engines take 16 kHz mono int16 PCM in arbitrary chunks and return the
+    # transcripts produced so far: partials while the speaker is talking,
+    # then one final per utterance.
+
+    def feed(self, pcm):
+        raise NotImplementedError
+
+    def finish(self):
+        return []
+
+    def reset(self):
+        pass
+
+
+def fake_pcm(text, seconds_per_word=0.3):
+    # Deterministic stand-in audio for a phrase, for offline fixtures.
+    words = max(len(text.split()), 1)
+    samples = int(SAMPLE_RATE * seconds_per_word * words)
+    rng = np.random.default_rng(zlib.crc32(text.encode()))
+    return rng.integers(-2000, 2000, samples, dtype="<i2").tobytes()
+
+
+class FixtureEngine(SpeechEngine):
+    # Recognizes only canned recordings, matched byte for byte as they
+    # stream in. Partials reveal words in proportion to audio received.
+
+    def __init__(self, fixtures):
+        self.fixtures = [(bytes(pcm), text) for pcm, text in fixtures]
+        self.reset()
+
+    @classmethod
+    def from_texts(cls, texts):
+        return cls((fake_pcm(text), text) for text in texts)
+
+    @classmethod
+    def from_dir(cls, path):
+        fixtures = []
+        for name in sorted(os.listdir(path)):
+            stem, ext = os.path.splitext(name)
+            if ext != ".pcm":
+                continue
+            with open(os.path.join(path, name), "rb") as f:
+                pcm = f.read()
+            with open(os.path.join(path, stem + ".txt")) as f:
+                fixtures.append((pcm, f.read().strip()))
+        return cls(fixtures)
+
+    def reset(self):
+        self._buffer = bytearray()
+        self._candidates = self.fixtures
+        self._words_shown = 0
+
+    def feed(self, pcm):
+        out = []
+        while pcm:
+            start = len(self._buffer)
+            end = start + len(pcm)
+            self._candidates = [
+                (audio, text) for audio, text in self._candidates
+                if audio[start:end] == pcm[:len(audio) - start]
+            ]
+            if not self._candidates:
+                self.reset()
+                return out
+            done = [(a, t) for a, t in self._candidates if len(a) <= end]
+            if done:
+                audio, text = done[0]
+                out.append(Transcript(text, True))
+                pcm = pcm[len(audio) - start:]
+                self.reset()
+                continue
+            self._buffer += pcm
+            pcm = b""
+            if len(self._candidates) == 1:
+                audio, text = self._candidates[0]
+                words = text.split()
+                shown = len(words) * len(self._buffer) // len(audio)
+                if shown > self._words_shown:
+                    self._words_shown = shown
+                    out.append(Transcript(" ".join(words[:shown]), False))
+        return out
+
+    def finish(self):
+        self.reset()
+        return []
+
+
+class Transcriber:
+    # Pipeline stage handler: forwards finals, reports partials on the side.
+
+    def __init__(self, engine, on_partial=None):
+        self.engine = engine
+        self.on_partial = on_partial
+
+    def __call__(self, chunk):
+        finals = []
+        for transcript in self.engine.feed(chunk):
+            if transcript.final:
+                finals.append(transcript.text)
+            elif self.on_partial is not None:
+                self.on_partial(transcript.text)
+        return finals or None
@@ -0,0 +1,253 @@
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from app.ledger import Ledger
+from app.pool import ConnectionPool
+from app.txlog import OP_ADJUST, OP_MARK, OP_PAR, OP_SET
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    unit INTEGER NOT NULL DEFAULT 0,
+    par REAL NOT NULL DEFAULT 0,
+    qty REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS movements (
+    seq INTEGER PRIMARY KEY,
+    ts INTEGER NOT NULL,
+    item INTEGER NOT NULL,
+    op INTEGER NOT NULL,
+    value REAL NOT NULL
+);
+"""
+
+# Fixed SQL text, so sqlite3's per-connection statement cache compiles
+# each one once and reuses it.
+INSERT_MOVEMENT = "INSERT INTO movements (ts, item, op, value) VALUES (?, ?, ?, ?)"
+ADD_QTY = "UPDATE items SET qty = qty + ? WHERE id = ?"
+SET_QTY = "UPDATE items SET qty = ? WHERE id = ?"
+SET_PAR = "UPDATE items SET par = ? WHERE id = ?"
+UPDATES = {OP_ADJUST: ADD_QTY, OP_SET: SET_QTY, OP_PAR: SET_PAR}
+UPSERT_ITEM = """
+INSERT INTO items (id, name, unit, par, qty) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    name = excluded.name, unit = excluded.unit, par = excluded.par,
+    qty = excluded.qty
+"""
+SELECT_ITEMS = "SELECT id, name, unit, par, qty FROM items ORDER BY id"
+SELECT_QTY = "SELECT qty FROM items WHERE id = ?"
+COUNT_MOVEMENTS = "SELECT count(*) FROM movements"
+LAST_MARK = """
+SELECT value FROM movements WHERE op = ? AND item = ?
+ORDER BY seq DESC LIMIT 1
+"""
+
+
+class SqliteStore:
+    # Durable stock storage on SQLite in WAL mode. Movements are buffered
+    # and written by one transaction per group commit (batch size or
+    # interval, whichever comes first), with executemany for the inserts
+    # and quantity updates. WAL lets pooled readers run alongside the
+    # writer. Offers the same record_* calls as TransactionLog.
+
+    def __init__(self, path, commit_interval=0.05, batch_size=500,
+                 readers=4):
+        self.path = path
+        self.commit_interval = commit_interval
+        self.batch_size = batch_size
+        self.pool = ConnectionPool(path, readers)
+        with self.pool.writer() as conn:
+            conn.executescript(SCHEMA)
+            self.count = conn.execute(COUNT_MOVEMENTS).fetchone()[0]
+        self.pool.open_readers()
+        self.commits = 0
+        self.last_error = None
+        self._pending = []
+        self._inflight = 0
+        self._oldest = 0.0
+        self._lock = threading.Lock()
+        self._commit_lock = threading.RLock()
+        self._wake = threading.Condition(self._lock)
+        self._closed = False
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+
+    def __len__(self):
+        return self.count + self._inflight + len(self._pending)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def save_catalog(self, ledger):
+        # Columns are read under the commit lock, after pending movements,
+        # so the quantities written match what has been committed.
+        with self._commit_lock:
+            self._commit_pending()
+            names, qty, par, unit = ledger.columns()
+            rows = zip(range(len(names)), names, unit.tolist(),
+                       par.tolist(), qty.tolist())
+            with self.pool.writer() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(UPSERT_ITEM, rows)
+                conn.execute("COMMIT")
+
+    def load_ledger(self):
+        with self.pool.reader() as conn:
+            rows = conn.execute(SELECT_ITEMS).fetchall()
+        if not rows:
+            return Ledger()
+        size = rows[-1][0] + 1
+        names = [""] * size
+        qty, par = np.zeros(size), np.zeros(size)
+        unit = np.zeros(size, dtype=np.uint8)
+        for item_id, name, u, p, q in rows:
+            names[item_id], unit[item_id], par[item_id], qty[item_id] = \
+                name, u, p, q
+        return Ledger.from_columns(names, qty, par, unit)
+
+    def quantity(self, item_id):
+        with self.pool.reader() as conn:
+            row = conn.execute(SELECT_QTY, (item_id,)).fetchone()
+        return None if row is None else row[0]
+
+    def append_many(self, ids, values, op=OP_ADJUST, ts=None):
+        ts = time.time_ns() if ts is None else ts
+        ops = np.broadcast_to(op, (len(ids),)).tolist()
+        rows = [(ts, int(i), o, float(v))
+                for i, o, v in zip(ids, ops, values)]
+        with self._lock:
+            if not self._pending:
+                self._oldest = time.monotonic()
+                self._wake.notify()
+            self._pending.extend(rows)
+            seq = len(self) - 1
+            if len(self._pending) >= self.batch_size:
+                # A full batch is due now, but the flusher commits it: the
+                # caller (e.g. the voice thread) never waits on SQLite.
+                self._oldest = time.monotonic() - self.commit_interval
+                self._wake.notify()
+        return seq
+
+    def append(self, item_id, value, op=OP_ADJUST, ts=None):
+        return self.append_many([item_id], [value], op, ts)
+
+    def record(self, ledger, item_id, delta):
+        new_qty = ledger.adjust(item_id, delta)
+        self.append(item_id, delta)
+        return new_qty
+
+    def record_many(self, ledger, ids, deltas, mark=None):
+        # The mark rides in the same pending batch, hence the same
+        # transaction, as the deltas it covers.
+        ledger.apply(ids, deltas)
+        ids, deltas = list(ids), list(deltas)
+        ops = [OP_ADJUST] * len(ids)
+        if mark is not None:
+            ids.append(mark[0])
+            deltas.append(mark[1])
+            ops.append(OP_MARK)
+        self.append_many(ids, deltas, op=ops)
+
+    def last_mark(self, source, default=0):
+        self.flush()
+        with self.pool.reader() as conn:
+            row = conn.execute(LAST_MARK, (OP_MARK, source)).fetchone()
+        return default if row is None else int(row[0])
+
+    def record_count(self, ledger, item_id, qty):
+        ledger.set_qty(item_id, qty)
+        self.append(item_id, qty, op=OP_SET)
+
+    def record_par(self, ledger, item_id, par):
+        ledger.set_par(item_id, par)
+        self.append(item_id, par, op=OP_PAR)
+
+    def flush(self):
+        self._commit_pending()
+
+    def _commit_pending(self):
+        # One transaction for the whole batch; runs of adjustments, counts
+        # and par edits keep their relative order. The batch is taken under
+        # the buffer lock but written outside it, so appends never wait on
+        # SQLite; the commit lock keeps batches committing in take order.
+        # The writer is acquired first, so a pool timeout takes nothing.
+        with self._commit_lock, self.pool.writer() as conn:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                self._inflight = len(batch)
+            if not batch:
+                return
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(INSERT_MOVEMENT, batch)
+                start = 0
+                for end in range(1, len(batch) + 1):
+                    if end == len(batch) or \
+                            batch[end][2] != batch[start][2]:
+                        sql = UPDATES.get(batch[start][2])
+                        if sql is not None:
+                            conn.executemany(sql, ((row[3], row[1])
+                                                   for row in
+                                                   batch[start:end]))
+                        start = end
+                conn.execute("COMMIT")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                self._requeue(batch)
+                raise
+            with self._lock:
+                self._inflight = 0
+                self.count += len(batch)
+                self.commits += 1
+
+    def _requeue(self, batch):
+        # A failed batch goes back in front of anything appended since and
+        # waits another full interval before the flusher retries it.
+        with self._lock:
+            self._pending = batch + self._pending
+            self._inflight = 0
+            self._oldest = time.monotonic()
+
+    def _flush_loop(self):
+        # Commits whatever is pending once its oldest movement has waited
+        # commit_interval, or as soon as a batch fills up.
+        while True:
+            with self._lock:
+                while not self._closed:
+                    if not self._pending:
+                        self._wake.wait()
+                        continue
+                    remaining = self._oldest + self.commit_interval \
+                        - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._wake.wait(remaining)
+                if self._closed:
+                    return
+            try:
+                self._commit_pending()
+            except (sqlite3.Error, TimeoutError) as exc:
+                # Batch stays pending; retried after another interval.
+                self.last_error = exc
+                with self._lock:
+                    self._oldest = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wake.notify()
+        self._flusher.join()
+        try:
+            self._commit_pending()
+        finally:
+            self.pool.close()
@@ -0,0 +1,179 @@
+import mmap
+import os
+import time
+
+import numpy as np
+
+OP_ADJUST = 0
+OP_SET = 1
+OP_PAR = 2
+# Resume point of an external feed: item = source id, value = position.
+# Written in the same append as the movements it covers.
+OP_MARK = 3
+
+RECORD = np.dtype([
+    ("seq", "<u8"),
+    ("ts", "<i8"),
+    ("item", "<u4"),
+    ("op", "<u4"),
+    ("value", "<f8"),
+])
+MAGIC = b"INVLOG\x00\x01"
+HEADER_SIZE = RECORD.itemsize
+
+
+class LogFormatError(Exception):
+    pass
+
+
+class TransactionLog:
+    # Append-only file of fixed-width records behind a one-record header.
+    # Record N has seq N, so offsets into the file are pure arithmetic.
+
+    def __init__(self, path, readonly=False):
+        # readonly is for shipping a log another process writes: no header,
+        # no truncation, and a partial tail is just not counted yet.
+        self.path = path
+        flags = os.O_RDONLY if readonly else \
+            os.O_RDWR | os.O_CREAT | os.O_APPEND
+        self._fd = os.open(path, flags, 0o644)
+        size = os.fstat(self._fd).st_size
+        if size == 0 and not readonly:
+            os.write(self._fd, MAGIC.ljust(HEADER_SIZE, b"\x00"))
+            size = HEADER_SIZE
+        elif size and os.pread(self._fd, len(MAGIC), 0) != MAGIC:
+            os.close(self._fd)
+            raise LogFormatError(f"not a stock log: {path}")
+        size = max(size, HEADER_SIZE)
+        torn = (size - HEADER_SIZE) % RECORD.itemsize
+        if torn and not readonly:
+            # A crash mid-append leaves a partial record; drop it.
+            size -= torn
+            os.ftruncate(self._fd, size)
+        self.count = (size - HEADER_SIZE) // RECORD.itemsize
+
+    def __len__(self):
+        return self.count
+
+    def refresh(self):
+        # Picks up records appended through another handle or process. A
+        # partial record at the end is a write in flight, not torn.
+        size = os.fstat(self._fd).st_size
+        self.count = max(self.count,
+                         (size - HEADER_SIZE) // RECORD.itemsize)
+        return self.count
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, item_id, value, op=OP_ADJUST, ts=None):
+        return self.append_many([item_id], [value], op, ts)
+
+    def append_many(self, ids, values, op=OP_ADJUST, ts=None):
+        n = len(ids)
+        recs = np.empty(n, dtype=RECORD)
+        recs["seq"] = np.arange(self.count, self.count + n)
+        recs["ts"] = time.time_ns() if ts is None else ts
+        recs["item"] = ids
+        recs["op"] = op
+        recs["value"] = values
+        os.write(self._fd, recs.tobytes())
+        self.count += n
+        return self.count - 1
+
+    def append_records(self, recs):
+        # Raw records copied from another log; they must continue this one.
+        recs = np.asarray(recs, dtype=RECORD)
+        if len(recs) and int(recs["seq"][0]) != self.count:
+            raise LogFormatError(
+                f"records start at {int(recs['seq'][0])}, log has {self.count}")
+        os.write(self._fd, recs.tobytes())
+        self.count += len(recs)
+        return self.count
+
+    def sync(self):
+        os.fsync(self._fd)
+
+    def records(self, start=0):
+        # Zero-copy view over the mapped file; the view keeps the map alive.
+        count = self.count - start
+        if count <= 0:
+            return np.empty(0, dtype=RECORD)
+        mm = mmap.mmap(self._fd, 0, access=mmap.ACCESS_READ)
+        return np.frombuffer(mm, dtype=RECORD, count=count,
+                             offset=HEADER_SIZE + start * RECORD.itemsize)
+
+    def replay(self, ledger, start=0):
+        recs = self.records(start)
+        n = len(recs)
+        if not n:
+            return 0
+        recs = recs[recs["op"] != OP_MARK]
+        if not len(recs):
+            return n
+        items = recs["item"].astype(np.intp)
+        values = recs["value"]
+        ledger.reserve(int(items.max()) + 1)
+        ops = recs["op"]
+        pars = ops == OP_PAR
+        if pars.any():
+            # Par edits: only each item's last one matters.
+            pos = np.arange(len(items))
+            last = np.full(len(ledger), -1, dtype=np.intp)
+            np.maximum.at(last, items[pars], pos[pars])
+            edited = np.flatnonzero(last >= 0)
+            ledger.assign_par(edited, values[last[edited]])
+            items, values, ops = items[~pars], values[~pars], ops[~pars]
+        sets = ops == OP_SET
+        if sets.any():
+            # A count overrides everything before it, so only deltas logged
+            # after an item's last count still apply.
+            pos = np.arange(len(items))
+            last = np.full(len(ledger), -1, dtype=np.intp)
+            np.maximum.at(last, items[sets], pos[sets])
+            counted = np.flatnonzero(last >= 0)
+            ledger.assign(counted, values[last[counted]])
+            keep = ~sets & (pos > last[items])
+            ledger.apply(items[keep], values[keep])
+        else:
+            ledger.apply(items, values)
+        return n
+
+    def record(self, ledger, item_id, delta):
+        new_qty = ledger.adjust(item_id, delta)
+        self.append(item_id, delta)
+        return new_qty
+
+    def record_many(self, ledger, ids, deltas, mark=None):
+        # mark=(source, position) is appended in the same write as the
+        # deltas, so a resumed feed never applies them twice.
+        ledger.apply(ids, deltas)
+        ids, deltas = list(ids), list(deltas)
+        ops = [OP_ADJUST] * len(ids)
+        if mark is not None:
+            ids.append(mark[0])
+            deltas.append(mark[1])
+            ops.append(OP_MARK)
+        self.append_many(ids, deltas, op=np.array(ops, dtype=np.uint32))
+
+    def last_mark(self, source, default=0):
+        recs = self.records()
+        hits = np.flatnonzero((recs["op"] == OP_MARK)
+                              & (recs["item"] == source))
+        return int(recs["value"][hits[-1]]) if len(hits) else default
+
+    def record_count(self, ledger, item_id, qty):
+        ledger.set_qty(item_id, qty)
+        self.append(item_id, qty, op=OP_SET)
+
+    def record_par(self, ledger, item_id, par):
+        ledger.set_par(item_id, par)
+        self.append(item_id, par, op=OP_PAR)
@@ -0,0 +1,108 @@
+import numpy as np
+
+from app.ledger import UNITS
+
+COUNT, MASS, VOLUME, PACK = range(4)
+
+# Base units are each, gram and millilitre; packs depend on the item.
+STANDARD = {
+    "ea": (COUNT, 1.0),
+    "lb": (MASS, 453.59237),
+    "oz": (MASS, 28.349523125),
+    "qt": (VOLUME, 946.352946),
+    "case": (PACK, np.nan),
+    "#10": (PACK, np.nan),
+}
+
+UNIT_DIMENSION = np.array([STANDARD[u][0] for u in UNITS], dtype=np.int8)
+UNIT_FACTOR = np.array([STANDARD[u][1] for u in UNITS])
+
+
+class UnitTable:
+    # factors[item, unit] = base units in one `unit` of that item, or NaN
+    # when the item cannot be measured that way. Conversions are then
+    # fancy-indexed gathers over whole columns instead of per-call lookups.
+
+    def __init__(self, ledger, cache=None):
+        self.ledger = ledger
+        self.cache = cache
+        self.factors = np.full((max(len(ledger), 1), len(UNITS)), np.nan)
+        self.dimension = np.full(len(self.factors), PACK, dtype=np.int8)
+        self.size = 0
+        self._sync()
+
+    def _grow(self, needed):
+        if needed <= len(self.factors):
+            return
+        rows = max(needed, 2 * len(self.factors))
+        factors = np.full((rows, len(UNITS)), np.nan)
+        factors[:len(self.factors)] = self.factors
+        dimension = np.full(rows, PACK, dtype=np.int8)
+        dimension[:len(self.dimension)] = self.dimension
+        self.factors, self.dimension = factors, dimension
+
+    def _sync(self):
+        # Rows for items added to the ledger since the last call.
+        start, stop = self.size, len(self.ledger)
+        if start >= stop:
+            return
+        self._grow(stop)
+        dims = UNIT_DIMENSION[self.ledger.unit[start:stop]]
+        self.dimension[start:stop] = dims
+        same = (dims[:, None] == UNIT_DIMENSION) & (dims[:, None] != PACK)
+        self.factors[start:stop] = np.where(same, UNIT_FACTOR, np.nan)
+        self.size = stop
+
+    def unit_index(self, unit):
+        return UNITS.index(unit) if isinstance(unit, str) else unit
+
+    def set_pack(self, item_id, pack_unit, amount, of_unit):
+        # e.g. set_pack(tomatoes, "case", 25, "lb"): a case holds 25 lb.
+        self._sync()
+        pack = self.unit_index(pack_unit)
+        inner = self.unit_index(of_unit)
+        dim = UNIT_DIMENSION[inner]
+        if UNIT_DIMENSION[pack] != PACK or dim == PACK:
+            raise ValueError(f"{pack_unit!r} must be a pack of a measured unit")
+        row = self.factors[item_id]
+        if self.dimension[item_id] == PACK:
+            # Item stocked by the pack: its pack contents define the dimension.
+            self.dimension[item_id] = dim
+            row[UNIT_DIMENSION == dim] = UNIT_FACTOR[UNIT_DIMENSION == dim]
+        elif self.dimension[item_id] != dim:
+            raise ValueError(f"item {item_id} is not measured in {of_unit!r}")
+        row[pack] = amount * row[inner]
+        if self.cache is not None:
+            self.cache.clear()
+
+    def convert(self, ids, qty, from_units, to_units):
+        self._sync()
+        ids = np.asarray(ids, dtype=np.intp)
+        f = self.factors[ids, np.asarray(from_units, dtype=np.intp)]
+        t = self.factors[ids, np.asarray(to_units, dtype=np.intp)]
+        return np.asarray(qty, dtype=np.float64) * f / t
+
+    def _ratio(self, item_id, from_unit, to_unit):
+        return float(self.convert(item_id, 1.0, from_unit, to_unit))
+
+    def convert_one(self, item_id, qty, from_unit, to_unit):
+        key = (item_id, self.unit_index(from_unit), self.unit_index(to_unit))
+        if self.cache is None or item_id >= self.size:
+            ratio = self._ratio(*key)
+        else:
+            ratio = self.cache.get_or_compute(key, lambda: self._ratio(*key))
+        value = qty * ratio
+        if np.isnan(value):
+            raise ValueError(f"cannot convert {from_unit} to {to_unit} "
+                             f"for {self.ledger.names[item_id]!r}")
+        return value
+
+    def stock_factors(self):
+        self._sync()
+        n = len(self.ledger)
+        return self.factors[np.arange(n), self.ledger.unit]
+
+    def to_base(self, qty):
+        # qty is in stock units with items on the last axis, e.g. a
+        # (location x item) matrix for a fleet-wide valuation.
+        return np.asarray(qty) * self.stock_factors()
@@ -0,0 +1,119 @@
+import numpy as np
+
+from app.speech import SAMPLE_RATE, SAMPLE_WIDTH, fake_pcm
+
+WAKE_PHRASE = "hey invyntra"
+
+
+class KeywordSpotter:
+    # Spotters watch raw PCM for the wake phrase. feed() returns the byte
+    # offset within the chunk just past the phrase, or None. They must stay
+    # cheap: they run on every chunk the microphone produces.
+
+    def feed(self, pcm):
+        raise NotImplementedError
+
+    def reset(self):
+        pass
+
+
+class FixtureSpotter(KeywordSpotter):
+    # Finds recorded wake phrases byte for byte. Only the last
+    # len(longest) - 1 bytes are carried between chunks, so a phrase split
+    # across chunks is still found and memory stays constant.
+
+    def __init__(self, templates):
+        self.templates = [bytes(t) for t in templates if t]
+        if not self.templates:
+            raise ValueError("at least one wake recording is required")
+        self._keep = max(len(t) for t in self.templates) - 1
+        self.reset()
+
+    @classmethod
+    def from_texts(cls, texts=(WAKE_PHRASE,)):
+        return cls(fake_pcm(text) for text in texts)
+
+    @classmethod
+    def from_files(cls, paths):
+        templates = []
+        for path in paths:
+            with open(path, "rb") as f:
+                templates.append(f.read())
+        return cls(templates)
+
+    def reset(self):
+        self._tail = b""
+
+    def feed(self, pcm):
+        carried = len(self._tail)
+        window = self._tail + bytes(pcm)
+        ends = [at + len(t) for t in self.templates
+                for at in [window.find(t)] if at >= 0]
+        if ends:
+            self._tail = b""
+            return min(ends) - carried
+        self._tail = window[-self._keep:] if self._keep else b""
+        return None
+
+
+def rms(pcm):
+    samples = np.frombuffer(pcm[:len(pcm) - len(pcm) % SAMPLE_WIDTH],
+                            dtype="<i2")
+    if not len(samples):
+        return 0.0
+    return float(np.sqrt(np.mean(samples.astype(np.float64) ** 2)))
+
+
+class WakeGate:
+    # Pipeline stage in front of transcription. Audio is dropped until the
+    # spotter hears the wake phrase; what follows is forwarded until
+    # `silence` seconds stay below `silence_rms` or `max_seconds` pass,
+    # then the gate closes and the spotter listens again.
+
+    def __init__(self, spotter, max_seconds=10.0, silence=1.5,
+                 silence_rms=200.0):
+        self.spotter = spotter
+        self.max_bytes = int(max_seconds * SAMPLE_RATE) * SAMPLE_WIDTH
+        self.silence_bytes = int(silence * SAMPLE_RATE) * SAMPLE_WIDTH
+        self.silence_rms = silence_rms
+        self.open = False
+        self.wakes = 0
+        self.bytes_seen = 0
+        self.bytes_forwarded = 0
+        self._sent = 0
+        self._quiet = 0
+
+    def close(self):
+        self.open = False
+        self.spotter.reset()
+
+    def __call__(self, chunk):
+        self.bytes_seen += len(chunk)
+        if not self.open:
+            at = self.spotter.feed(chunk)
+            if at is None:
+                return None
+            self.open = True
+            self.wakes += 1
+            self._sent = self._quiet = 0
+            chunk = chunk[at:]
+            if not chunk:
+                return None
+        chunk = chunk[:self.max_bytes - self._sent]
+        self._sent += len(chunk)
+        self._quiet = self._quiet + len(chunk) \
+            if rms(chunk) < self.silence_rms else 0
+        if self._sent >= self.max_bytes or self._quiet >= self.silence_bytes:
+            self.close()
+        self.bytes_forwarded += len(chunk)
+        return chunk
+
+    def stats(self):
+        return {
+            "gate": "wake",
+            "wakes": self.wakes,
+            "seen": self.bytes_seen,
+            "forwarded": self.bytes_forwarded,
+            "forwarded_ratio": (self.bytes_forwarded / self.bytes_seen
+                                if self.bytes_seen else 0.0),
+        }
@@ -0,0 +1,93 @@
+import heapq
+
+import numpy as np
+
+
+class Watchlist:
+    # Below-par items maintained on every ledger write: a bitset says which
+    # items are low, and a heap orders them by days of cover. Heap entries
+    # are invalidated lazily by a per-item version, and the heap is rebuilt
+    # from the bitset once stale entries outnumber live ones.
+
+    def __init__(self, ledger, daily_usage=None):
+        self.ledger = ledger
+        self.low = np.zeros(0, dtype=bool)
+        self.version = np.zeros(0, dtype=np.int64)
+        self.usage = np.zeros(0)
+        self.count = 0
+        self.heap = []
+        self.set_usage(daily_usage)
+        ledger.subscribe_writes(self._on_write)
+        ledger.subscribe_catalog(lambda item_id, old, new: self._on_write(
+            item_id))
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self, size):
+        if size <= len(self.low):
+            return
+        size = max(size, 2 * len(self.low), 64)
+        for attr in ("low", "version", "usage"):
+            old = getattr(self, attr)
+            new = np.zeros(size, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, attr, new)
+
+    def set_usage(self, daily_usage=None):
+        n = len(self.ledger)
+        self._grow(n)
+        self.usage[:] = 0.0
+        if daily_usage is not None:
+            self.usage[:n] = daily_usage
+        self.rebuild()
+
+    def _key(self, item_id):
+        qty = float(self.ledger.qty[item_id])
+        par = float(self.ledger.par[item_id])
+        usage = self.usage[item_id]
+        cover = qty / usage if usage > 0 else float("inf")
+        return cover, qty / par
+
+    def rebuild(self):
+        n = len(self.ledger)
+        self._grow(n)
+        qty, par = self.ledger.qty, self.ledger.par
+        low = (par > 0) & (qty < par)
+        self.low[:n] = low
+        self.low[n:] = False
+        self.version += 1
+        self.count = int(low.sum())
+        self.heap = [self._key(i) + (int(self.version[i]), int(i))
+                     for i in np.flatnonzero(low)]
+        heapq.heapify(self.heap)
+
+    def _on_write(self, ids):
+        if np.ndim(ids):
+            if len(ids) > len(self.ledger) // 4:
+                self.rebuild()
+                return
+            ids = np.unique(ids).tolist()
+        else:
+            ids = [int(ids)]
+        self._grow(len(self.ledger))
+        qty, par = self.ledger.qty, self.ledger.par
+        for item_id in ids:
+            was_low = self.low[item_id]
+            is_low = bool(par[item_id] > 0 and qty[item_id] < par[item_id])
+            self.version[item_id] += 1
+            self.low[item_id] = is_low
+            self.count += int(is_low) - int(was_low)
+            if is_low:
+                heapq.heappush(self.heap, self._key(item_id) + (
+                    int(self.version[item_id]), item_id))
+        if len(self.heap) > 2 * self.count + 64:
+            self.rebuild()
+
+    def items(self, limit=None):
+        # Low item ids, least days of cover first.
+        live = [entry for entry in self.heap
+                if entry[2] == self.version[entry[3]]]
+        if limit is not None:
+            return [entry[3] for entry in heapq.nsmallest(limit, live)]
+        return [entry[3] for entry in sorted(live)]
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from app.analytics import RollingAnalytics
+
+
+def test_windows_roll_incrementally():
+    stats = RollingAnalytics(items=2)
+    for day in range(100):
+        stats.advance_to(day)
+        stats.record("waste", [0], [1.0])
+        stats.record("actual", [1, 1], [2.0, 1.0])
+    assert stats.report(7)["waste"].tolist() == [7, 0]
+    assert stats.report(28)["waste"][0] == 28
+    assert stats.report(90)["actual"][1] == 270
+
+
+def test_gap_longer_than_window_clears_everything():
+    stats = RollingAnalytics(items=1)
+    stats.record("cost", 0, 5.0)
+    stats.advance_to(8)
+    assert stats.report(7)["cost"][0] == 0
+    assert stats.report(28)["cost"][0] == 5
+    stats.advance_to(500)
+    assert stats.report(90)["cost"][0] == 0
+
+
+def test_variance_against_theoretical():
+    stats = RollingAnalytics(items=3)
+    stats.record_vector("theoretical", [10.0, 4.0, 0.0])
+    stats.record("actual", [0, 1, 2], [12.0, 3.0, 1.0])
+    report = stats.report(7)
+    assert report["variance"].tolist() == [2, -1, 1]
+    assert report["variance_pct"].tolist() == pytest.approx([20, -25, 0])
+
+
+def test_matches_recompute_from_raw_history():
+    rng = np.random.default_rng(4)
+    stats = RollingAnalytics(items=0)
+    history = np.zeros((200, 50))
+    for day in range(200):
+        stats.advance_to(day)
+        ids = rng.integers(0, 50, 20)
+        amounts = rng.uniform(0, 5, 20)
+        stats.record("waste", ids, amounts)
+        np.add.at(history[day], ids, amounts)
+    for window in (7, 28, 90):
+        expected = history[200 - window:].sum(axis=0)
+        assert stats.report(window)["waste"] == pytest.approx(expected)
+
+
+def test_cannot_go_back():
+    stats = RollingAnalytics(day=10)
+    with pytest.raises(ValueError):
+        stats.advance_to(9)
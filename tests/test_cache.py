@@ -0,0 +1,82 @@
+import pytest
+
+from app.cache import LRUCache
+from app.ledger import Ledger
+from app.resolver import ItemResolver
+from app.units import UnitTable
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3 and stats["misses"] == 1
+    assert stats["size"] == 2
+
+
+def test_ttl_expires_entries():
+    now = [0.0]
+    cache = LRUCache(ttl=5, clock=lambda: now[0])
+    cache.put("a", 1)
+    now[0] = 4.9
+    assert cache.get("a") == 1
+    now[0] = 5.0
+    assert cache.get("a", "gone") == "gone"
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0
+
+
+def test_get_or_compute_caches_none():
+    cache = LRUCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return None
+
+    assert cache.get_or_compute("x", compute) is None
+    assert cache.get_or_compute("x", compute) is None
+    assert len(calls) == 1
+    cache.invalidate("x")
+    cache.get_or_compute("x", compute)
+    assert len(calls) == 2
+    assert cache.stats()["invalidations"] == 1
+    with pytest.raises(ValueError):
+        LRUCache(maxsize=0)
+
+
+def test_resolver_cache_follows_catalog_edits():
+    ledger = Ledger()
+    ledger.add_item("romaine")
+    cache = LRUCache()
+    resolver = ItemResolver(ledger, cache=cache)
+    assert resolver.resolve("Mozzerella") is None
+    assert resolver.resolve("mozzerella") is None
+    assert cache.hits == 1
+    mozz = ledger.add_item("mozzarella")
+    assert resolver.resolve("mozzerella") == mozz
+    ledger.rename_item(mozz, "fresh mozzarella")
+    assert resolver.resolve("mozzerella") == mozz
+    assert resolver.resolve("rommaine") == ledger.item_id("romaine")
+    ledger.rename_item(0, "iceberg")
+    assert resolver.resolve("rommaine") is None
+
+
+def test_unit_cache_cleared_by_pack_changes():
+    ledger = Ledger()
+    tomatoes = ledger.add_item("tomatoes", unit="case")
+    units = UnitTable(ledger, cache=LRUCache())
+    units.set_pack(tomatoes, "case", 25, "lb")
+    assert units.convert_one(tomatoes, 2, "case", "lb") == pytest.approx(50)
+    assert units.convert_one(tomatoes, 4, "case", "lb") == pytest.approx(100)
+    assert units.cache.hits == 1
+    units.set_pack(tomatoes, "case", 20, "lb")
+    assert units.convert_one(tomatoes, 2, "case", "lb") == pytest.approx(40)
+    with pytest.raises(ValueError):
+        units.convert_one(tomatoes, 1, "case", "qt")
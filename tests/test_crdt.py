@@ -0,0 +1,80 @@
+import itertools
+
+import numpy as np
+
+from app.crdt import PNCounters
+from app.ledger import Ledger
+from app.txlog import TransactionLog
+
+
+def test_offline_devices_merge_deterministically():
+    walk_in = PNCounters("walk-in", items=3)
+    line = PNCounters("line", items=3)
+    walk_in.add([0, 1], [10, 5])
+    line.add([0, 2, 0], [-3, 4, -1])
+    a = PNCounters.from_bytes(walk_in.to_bytes()).merge(line)
+    b = PNCounters.from_bytes(line.to_bytes()).merge(walk_in)
+    assert a.value().tolist() == b.value().tolist() == [6, 5, 4]
+
+
+def test_merge_is_idempotent_and_order_free():
+    rng = np.random.default_rng(0)
+    replicas = []
+    for name in ("a", "b", "c"):
+        counters = PNCounters(name)
+        for _ in range(20):
+            counters.add(rng.integers(0, 50, 5), rng.integers(-5, 6, 5))
+        replicas.append(counters)
+    results = []
+    for order in itertools.permutations(replicas):
+        merged = PNCounters("hq")
+        for counters in order + order:
+            merged.merge(counters)
+        results.append(merged.value())
+    assert all(np.array_equal(results[0], r) for r in results)
+    expected = sum(np.pad(r.value(), (0, 50 - r.items)) for r in replicas)
+    assert np.array_equal(np.pad(results[0], (0, 50 - len(results[0]))),
+                          expected)
+
+
+def test_counts_and_round_trip_keeps_local_device():
+    tablet = PNCounters("tablet")
+    tablet.add(1, 4)
+    tablet.set(1, 10)
+    assert tablet.value(1) == 10
+    restored = PNCounters.from_bytes(tablet.to_bytes(), device="kiosk")
+    assert restored.devices == ["tablet", "kiosk"]
+    restored.add(0, 2)
+    assert restored.value().tolist() == [2, 10]
+    assert tablet.value().tolist() == [0, 10]
+
+
+def test_concurrent_counts_do_not_add_up():
+    a, b = PNCounters("a", items=1), PNCounters("b", items=1)
+    a.add(0, 10)
+    b.merge(a)
+    a.set(0, 7, ts=100)
+    b.set(0, 7, ts=101)
+    assert PNCounters.from_bytes(a.to_bytes()).merge(b).value(0) == 7
+    b.add(0, -2)
+    assert a.merge(b).value(0) == 5
+    a.add(0, 1)
+    b.merge(a)
+    assert a.value(0) == b.value(0) == 6
+    restored = PNCounters.from_bytes(a.to_bytes(), device="c")
+    assert restored.value(0) == 6
+    assert restored.count_by.tolist() == ["b"]
+
+
+def test_apply_to_ledger_goes_through_the_log(tmp_path):
+    ledger = Ledger()
+    ledger.add_item("butter")
+    counters = PNCounters("tablet")
+    counters.add([0, 2], [3, 1])
+    with TransactionLog(tmp_path / "stock.log") as log:
+        assert counters.apply_to(ledger, log) == 2
+        assert ledger.qty.tolist() == [3, 0, 1]
+        replayed = Ledger()
+        log.replay(replayed)
+        assert replayed.qty.tolist() == [3, 0, 1]
+        assert counters.apply_to(ledger, log) == 0
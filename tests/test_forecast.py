@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from app.forecast import Smoother
+
+
+def scalar_ses(series, alpha):
+    level = series[0]
+    for x in series:
+        level = alpha * x + (1 - alpha) * level
+    return level
+
+
+def test_simple_smoothing_matches_scalar_reference():
+    rng = np.random.default_rng(0)
+    history = rng.poisson(5, (30, 4)).astype(float)
+    model = Smoother(alpha=0.2).fit(history)
+    for j in range(4):
+        assert model.level[j] == pytest.approx(scalar_ses(history[:, j], 0.2))
+    assert model.forecast(3).shape == (3, 4)
+    assert np.allclose(model.forecast(3), model.level)
+
+
+def test_holt_tracks_linear_trend():
+    days = np.arange(60, dtype=float)
+    history = np.stack([2 * days + 5, np.full(60, 3.0)], axis=1)
+    model = Smoother(alpha=0.5, beta=0.3).fit(history)
+    assert model.forecast(5)[-1] == pytest.approx([2 * 64 + 5, 3], rel=1e-2)
+
+
+def test_holt_winters_learns_weekly_pattern():
+    week = np.array([10, 10, 10, 10, 20, 30, 15], dtype=float)
+    history = np.tile(week, 12)[:, None] * np.array([1.0, 2.0])
+    model = Smoother(alpha=0.2, beta=0.05, gamma=0.3, season=7).fit(history)
+    assert model.forecast(7)[:, 0] == pytest.approx(week, abs=0.5)
+    assert model.forecast(7)[:, 1] == pytest.approx(2 * week, abs=1.0)
+
+
+def test_incremental_update_equals_refit():
+    rng = np.random.default_rng(3)
+    history = rng.gamma(2, 3, (50, 2, 5))
+    full = Smoother(0.3, 0.1, 0.2, season=7).fit(history)
+    partial = Smoother(0.3, 0.1, 0.2, season=7).fit(history[:49])
+    partial.update(history[49])
+    assert np.allclose(full.level, partial.level)
+    assert np.allclose(full.forecast(10), partial.forecast(10))
+
+
+def test_missing_days_leave_state_untouched():
+    model = Smoother(alpha=0.5).fit([[4.0, 4.0]])
+    model.update([np.nan, 8.0])
+    assert model.level.tolist() == [4.0, 6.0]
+
+
+def test_save_and_load(tmp_path):
+    model = Smoother(0.3, 0.1, 0.2, season=7).fit(np.ones((14, 3)))
+    model.save(tmp_path / "state.npz")
+    loaded = Smoother.load(tmp_path / "state.npz")
+    assert loaded.t == 14 and loaded.season == 7 and loaded.beta == 0.1
+    assert np.allclose(loaded.forecast(7), model.forecast(7))
+
+
+def test_rejects_season_without_length():
+    with pytest.raises(ValueError):
+        Smoother(gamma=0.1)
@@ -0,0 +1,146 @@
+import json
+
+from app.ingest import (ingest, micro_batches, parse_sales, source_id,
+                        tail_lines)
+from app.ledger import Ledger
+from app.main import run
+from app.recipes import RecipeBook, load_recipes
+from app.snapshot import SNAPSHOT_NAME, write_snapshot
+from app.txlog import TransactionLog
+
+
+def make_book():
+    ledger = Ledger()
+    ledger.add_item("buns", qty=100)
+    ledger.add_item("patties", qty=100)
+    book = RecipeBook(ledger)
+    burger = book.add_dish("burger")
+    book.set_component(burger, 0, 1)
+    book.set_component(burger, 1, 1)
+    double = book.add_dish("double")
+    book.set_component(double, 0, 1)
+    book.set_component(double, 1, 2)
+    return ledger, book
+
+
+def test_tail_resumes_and_holds_partial_lines(tmp_path):
+    path = tmp_path / "sales.jsonl"
+    path.write_bytes(b"one\ntwo\nthr")
+    lines = list(tail_lines(path, follow=False))
+    assert lines == [("one", 4), ("two", 8)]
+    with open(path, "ab") as f:
+        f.write(b"ee\n")
+    assert list(tail_lines(path, offset=8, follow=False)) == [("three", 14)]
+
+
+def test_tail_heartbeats_while_idle(tmp_path):
+    path = tmp_path / "sales.jsonl"
+    path.write_text("a\n")
+    polls = []
+    gen = tail_lines(path, sleep=polls.append)
+    assert next(gen) == ("a", 2)
+    assert next(gen) is None
+    assert next(gen) is None
+    assert len(polls) == 1
+
+
+def test_micro_batches_by_count_and_time():
+    ticks = iter(range(100))
+    batches = list(micro_batches([1, 2, 3, 4, 5], max_count=2,
+                                 max_seconds=100, clock=lambda: 0))
+    assert batches == [[1, 2], [3, 4], [5]]
+    batches = list(micro_batches([1, None, None, 2], max_count=10,
+                                 max_seconds=2,
+                                 clock=lambda: next(ticks)))
+    assert batches == [[1], [2]]
+
+
+def test_parse_csv_and_skip_bad_rows():
+    ledger, book = make_book()
+    lines = [("dish,qty", 9), ("burger,3", 18), ("pizza,1", 26),
+             ("double,x", 35), ("double,1", 44)]
+    skipped = []
+    sales = list(parse_sales(lines, book, fmt="csv", skipped=skipped))
+    assert [(s.dish, s.qty, o) for s, o in sales] == [(0, 3, 18), (1, 1, 44)]
+    assert skipped == ["pizza,1", "double,x"]
+
+
+def test_ingest_applies_one_depletion_per_batch(tmp_path):
+    ledger, book = make_book()
+    path = tmp_path / "sales.jsonl"
+    rows = [{"dish": "burger", "qty": 2}] * 5 + [{"dish": "double"}] * 3
+    path.write_text("".join(json.dumps(r) + "\n" for r in rows))
+    seen = []
+    with TransactionLog(tmp_path / "stock.log") as log:
+        offset = ingest(book, log, path, max_count=4, follow=False,
+                        on_batch=lambda n, off: seen.append(n))
+        assert len(log) == 4
+    assert seen == [4, 4]
+    assert offset == path.stat().st_size
+    assert ledger.qty.tolist() == [87, 84]
+
+
+def test_ingest_subcommand_resumes_from_saved_offset(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    ledger, log = run(["--data-dir", str(data)])
+    ledger.add_item("buns", qty=50)
+    write_snapshot(data / SNAPSHOT_NAME, ledger.columns(), len(log))
+    log.close()
+    recipes = tmp_path / "recipes.json"
+    recipes.write_text(json.dumps({"burger": {"items": {"buns": 1}}}))
+    export = tmp_path / "sales.jsonl"
+    export.write_text('{"dish": "burger", "qty": 3}\n')
+    args = ["--data-dir", str(data), "ingest", str(export),
+            "--recipes", str(recipes), "--once"]
+    ledger, log = run(args)
+    log.close()
+    assert ledger.qty.tolist() == [47]
+    with open(export, "a") as f:
+        f.write('{"dish": "burger", "qty": 1}\n')
+    ledger, log = run(args)
+    log.close()
+    assert ledger.qty.tolist() == [46]
+    assert load_recipes(ledger, recipes).flat(0) == {0: 1}
+
+
+def test_csv_ingest_resumes_past_the_header(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    ledger, log = run(["--data-dir", str(data)])
+    ledger.add_item("buns", qty=100)
+    write_snapshot(data / SNAPSHOT_NAME, ledger.columns(), len(log))
+    log.close()
+    recipes = tmp_path / "recipes.json"
+    recipes.write_text(json.dumps({"burger": {"items": {"buns": 1}}}))
+    export = tmp_path / "sales.csv"
+    export.write_text("dish,qty\nburger,1\n")
+    args = ["--data-dir", str(data), "ingest", str(export), "--recipes",
+            str(recipes), "--format", "csv", "--once"]
+    ledger, log = run(args)
+    log.close()
+    assert ledger.qty.tolist() == [99]
+    with open(export, "a") as f:
+        f.write("burger,2\nburger,3\n")
+    ledger, log = run(args)
+    log.close()
+    assert ledger.qty.tolist() == [94]
+    with TransactionLog(data / "stock.log") as log:
+        assert log.last_mark(source_id(export)) == export.stat().st_size
+
+
+def test_resume_mark_is_written_with_the_depletion(tmp_path):
+    ledger, book = make_book()
+    path = tmp_path / "sales.jsonl"
+    path.write_text('{"dish": "burger"}\n' * 3)
+    with TransactionLog(tmp_path / "stock.log") as log:
+        offset = ingest(book, log, path, max_count=2, follow=False,
+                        source=7)
+        recs = log.records()
+        assert recs["op"].tolist() == [0, 0, 3, 0, 0, 3]
+        assert log.last_mark(7) == offset == path.stat().st_size
+        assert log.last_mark(8) == 0
+        replayed = Ledger()
+        log.replay(replayed)
+    assert len(replayed) == 2
+    assert replayed.qty.tolist() == [-3, -3]
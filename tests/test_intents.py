@@ -0,0 +1,140 @@
+import time
+
+from app.intents import Intent, IntentParser
+from app.ledger import Ledger
+from app.main import apply_intent
+from app.txlog import TransactionLog
+from app.units import UnitTable
+
+
+def make_parser():
+    ledger = Ledger()
+    ledger.add_item("tomatoes", unit="case", qty=3)
+    ledger.add_item("flour", unit="lb", qty=40)
+    ledger.add_item("salmon", unit="lb", qty=12)
+    ledger.add_item("butter", unit="lb", qty=10)
+    ledger.add_item("half and half", unit="qt", qty=4)
+    parser = IntentParser(ledger, synonyms={"king salmon": "salmon"})
+    return ledger, parser
+
+
+def test_core_utterances():
+    ledger, parser = make_parser()
+    assert parser("add two cases of tomatoes") == Intent(
+        "add", 0, 2.0, "case", "add two cases of tomatoes")
+    assert parser("how much flour is left").action == "query"
+    assert parser("how much flour is left").item == 1
+    assert parser("86 the salmon")[:4] == ("86", 2, 0.0, None)
+    assert parser("used 4 pounds of butter")[:4] == ("use", 3, 4.0, "lb")
+    assert parser("used two and a half pounds of butter").quantity == 2.5
+    assert parser("tossed a quart of half and half")[:4] == (
+        "waste", 4, 1.0, "qt")
+    assert parser("we have 86 pounds of flour")[:3] == ("count", 1, 86.0)
+
+
+def test_synonyms_and_plurals():
+    ledger, parser = make_parser()
+    assert parser("received a case of tomato").item == 0
+    assert parser("86 the king salmon").item == 2
+    parser.add_synonym("AP flour", 1)
+    assert parser("used a pound of ap flour").item == 1
+
+
+def test_unparseable():
+    ledger, parser = make_parser()
+    assert parser("hello there") is None
+    assert parser("add two cases of durian") is None
+
+
+def test_large_vocabulary_stays_fast():
+    ledger, parser = make_parser()
+    for i in range(10_000):
+        parser.add_synonym(f"product number {i} special", i % len(ledger))
+    start = time.perf_counter()
+    for _ in range(1000):
+        parser("add two cases of product number 9999 special")
+    assert (time.perf_counter() - start) / 1000 < 0.001
+
+
+def test_apply_intent(tmp_path):
+    ledger, parser = make_parser()
+    with TransactionLog(tmp_path / "stock.log") as log:
+        apply_intent(ledger, log, parser("add two cases of tomatoes"))
+        apply_intent(ledger, log, parser("used 4 pounds of butter"))
+        apply_intent(ledger, log, parser("86 the salmon"))
+        message = apply_intent(ledger, log, parser("used 2 cases of butter"))
+        assert len(log) == 3
+    assert ledger.qty.tolist()[:4] == [5, 40, 0, 6]
+    assert message.startswith("can't record")
+
+
+def test_apply_intent_converts_units(tmp_path):
+    ledger, parser = make_parser()
+    units = UnitTable(ledger)
+    with TransactionLog(tmp_path / "stock.log") as log:
+        apply_intent(ledger, log, parser("used 8 ounces of butter"), units)
+    assert ledger.qty[3] == 9.5
+
+
+def test_compound_numbers():
+    ledger, parser = make_parser()
+    cases = {
+        "add two hundred pounds of flour": 200,
+        "add one hundred pounds of flour": 100,
+        "add a hundred pounds of flour": 100,
+        "add twenty five pounds of flour": 25,
+        "received thirteen pounds of flour": 13,
+        "add one hundred and fifty pounds of flour": 150,
+        "add two hundred twenty five pounds of flour": 225,
+        "add ninety nine pounds of flour": 99,
+        "add a dozen pounds of flour": 12,
+        "add two dozen pounds of flour": 24,
+        "add 2 dozen pounds of flour": 24,
+        "add one thousand two hundred pounds of flour": 1200,
+        "add three and a half pounds of flour": 3.5,
+        "we have 86 pounds of flour": 86,
+    }
+    for text, qty in cases.items():
+        assert parser(text).quantity == qty, text
+
+
+def test_grouped_digits():
+    ledger, parser = make_parser()
+    assert parser("add 1,000 pounds of flour").quantity == 1000
+    assert parser("received 2,500 pounds of flour").quantity == 2500
+    assert parser("add 1,250.5 pounds of flour").quantity == 1250.5
+    assert parser("add 12,5 pounds of flour") is None
+
+
+def test_unparseable_quantities_are_rejected():
+    ledger, parser = make_parser()
+    assert parser("add two three pounds of flour") is None
+    assert parser("add twenty thirty pounds of flour") is None
+    assert parser("add fifteen five pounds of flour") is None
+    assert parser("add pounds of flour") is None
+    assert parser("add two pounds of flour and 3 pounds of flour") is None
+    assert parser("how much flour is left").quantity is None
+
+
+def test_catalog_edits_update_the_trie():
+    ledger, parser = make_parser()
+    ledger.rename_item(0, "roma tomatoes")
+    assert parser("add two cases of tomatoes") is None
+    assert parser("add two cases of roma tomato").item == 0
+    kale = ledger.add_item("kale", unit="case")
+    assert parser("used a case of kale").item == kale
+    assert "tomatoes" not in parser.trie
+    assert parser("add a case of half and half").item == 4
+
+
+def test_query_answers_in_the_unit_asked_for(tmp_path):
+    ledger, parser = make_parser()
+    units = UnitTable(ledger)
+    with TransactionLog(tmp_path / "stock.log") as log:
+        intent = parser("how many ounces of butter")
+        assert (intent.quantity, intent.unit) == (None, "oz")
+        assert apply_intent(ledger, log, intent, units) == "butter: 160 oz"
+        assert apply_intent(ledger, log, intent) == "butter: 10 lb"
+        intent = parser("how many quarts of butter")
+        assert apply_intent(ledger, log, intent, units) == "butter: 10 lb"
+        assert len(log) == 0
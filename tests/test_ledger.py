@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from app.ledger import Ledger
+
+
+def test_add_and_lookup():
+    ledger = Ledger(capacity=2)
+    butter = ledger.add_item("Butter", unit="lb", par=10, qty=4)
+    flour = ledger.add_item("flour", unit="lb", par=20, qty=50)
+    salmon = ledger.add_item("Salmon", unit="lb")
+    assert len(ledger) == 3
+    assert ledger.item_id("  BUTTER ") == butter
+    assert ledger.item(flour)["qty"] == 50
+    assert ledger.item(salmon)["unit"] == "lb"
+    with pytest.raises(ValueError):
+        ledger.add_item("butter")
+    with pytest.raises(ValueError):
+        ledger.add_item("mystery", unit="bushel")
+
+
+def test_adjust_and_batch_apply():
+    ledger = Ledger()
+    a = ledger.add_item("a", qty=1)
+    b = ledger.add_item("b", qty=2)
+    assert ledger.adjust(a, 4) == 5
+    ledger.apply([a, b, a], [1.0, -2.0, 1.0])
+    assert ledger.qty.tolist() == [7.0, 0.0]
+    with pytest.raises(IndexError):
+        ledger.adjust(5, 1)
+    with pytest.raises(IndexError):
+        ledger.apply([0, 9], [1.0, 1.0])
+
+
+def test_below_par():
+    ledger = Ledger()
+    ledger.add_item("low", par=10, qty=3)
+    ledger.add_item("ok", par=10, qty=12)
+    ledger.add_item("untracked", qty=0)
+    assert np.array_equal(ledger.below_par(), [0])
+
+
+def test_reserve_pads_unnamed_rows():
+    ledger = Ledger()
+    ledger.add_item("a")
+    ledger.reserve(4)
+    assert len(ledger) == 4
+    assert ledger.names[3] == ""
+    assert ledger.add_item("b") == 4
+
+
+def test_rename_notifies_catalog_listeners():
+    ledger = Ledger()
+    events = []
+    ledger.subscribe_catalog(lambda *event: events.append(event))
+    a = ledger.add_item("Romaine")
+    ledger.add_item("kale")
+    ledger.rename_item(a, "Romaine Hearts")
+    assert ledger.item_id("romaine hearts") == a
+    assert "romaine" not in ledger.ids
+    assert events == [(0, "", "romaine"), (1, "", "kale"),
+                      (0, "romaine", "romaine hearts")]
+    with pytest.raises(ValueError):
+        ledger.rename_item(a, "kale")
@@ -0,0 +1,98 @@
+import pytest
+
+from app.intents import IntentParser
+from app.ledger import Ledger
+from app.lots import LotTracker, load_shelf_life
+from app.main import apply_intent
+from app.recipes import RecipeBook
+from app.txlog import TransactionLog
+
+HOUR = 3600.0
+
+
+def test_fifo_consumption():
+    lots = LotTracker()
+    first = lots.receive(7, 10, expiry=100 * HOUR, received=0)
+    second = lots.receive(7, 5, expiry=50 * HOUR, received=HOUR)
+    taken, short = lots.consume(7, 12)
+    assert taken == [(first, 10), (second, 2)]
+    assert short == 0
+    assert lots.on_hand(7) == 3
+    taken, short = lots.consume(7, 5)
+    assert taken == [(second, 3)] and short == 2
+    assert len(lots) == 0 and lots.on_hand(7) == 0
+    assert lots.consume(8, 1) == ([], 1)
+    with pytest.raises(ValueError):
+        lots.receive(7, 0, expiry=1)
+
+
+def test_expiring_window_skips_consumed_lots():
+    lots = LotTracker()
+    milk = lots.receive(1, 4, expiry=10 * HOUR, received=0)
+    fish = lots.receive(2, 6, expiry=30 * HOUR, received=0)
+    lots.receive(3, 2, expiry=90 * HOUR, received=0)
+    lots.consume(1, 4)
+    assert lots.expiring(48 * HOUR, now=0) == [(fish, 2, 6, 30 * HOUR)]
+    assert lots.expiring(48 * HOUR, now=0) == [(fish, 2, 6, 30 * HOUR)]
+    assert len(lots.heap) == 2
+    assert milk not in lots.lots
+    assert lots.discard(fish) == 6
+    assert lots.expiring(100 * HOUR, now=0)[0][1] == 3
+
+
+def test_voice_query():
+    ledger = Ledger()
+    ledger.add_item("salmon", unit="lb")
+    lots = LotTracker()
+    intent = IntentParser(ledger)("what's expiring")
+    assert apply_intent(ledger, None, intent).startswith(
+        "Lot tracking isn't set up")
+    assert apply_intent(ledger, None, intent, lots=lots) == \
+        "Nothing expires in the next 48 hours."
+    lots.receive(0, 6, expiry=0)
+    assert apply_intent(ledger, None, intent, lots=lots) == \
+        "Expiring soon: 6 salmon"
+
+
+def test_voice_movements_feed_lots(tmp_path):
+    ledger = Ledger()
+    salmon = ledger.add_item("salmon", unit="lb")
+    (tmp_path / "shelf.json").write_text('{"Salmon": 1}')
+    lots = LotTracker(load_shelf_life(ledger, tmp_path / "shelf.json"))
+    parser = IntentParser(ledger)
+    with TransactionLog(tmp_path / "stock.log") as log:
+        for text in ["received ten pounds of salmon",
+                     "received four pounds of salmon",
+                     "used twelve pounds of salmon"]:
+            apply_intent(ledger, log, parser(text), lots=lots)
+        assert lots.on_hand(salmon) == 2
+        assert apply_intent(ledger, log, parser("what's expiring"),
+                            lots=lots) == "Expiring soon: 2 salmon"
+        apply_intent(ledger, log, parser("86 the salmon"), lots=lots)
+    assert len(lots) == 0
+
+
+def test_lots_follow_the_log_and_checkpoint(tmp_path):
+    ledger = Ledger()
+    buns = ledger.add_item("buns")
+    book = RecipeBook(ledger)
+    burger = book.add_dish("burger")
+    book.set_component(burger, buns, 2)
+    lots = LotTracker({buns: 5 * HOUR})
+    path = tmp_path / "lots.json"
+    with TransactionLog(tmp_path / "stock.log") as log:
+        log.append(buns, 10, ts=0)
+        log.append(buns, 20, ts=int(HOUR * 1e9))
+        assert lots.catch_up(log) == 2
+        lots.save(path)
+        book.deplete(log, book.sales_vector([burger], [6]))
+        assert lots.catch_up(log) == 1
+        assert lots.on_hand(buns) == 18
+        assert lots.expiring(0, now=6 * HOUR) == [(1, buns, 18, 6 * HOUR)]
+        # A crash after the checkpoint: the log tail is replayed.
+        loaded = LotTracker.load(path, log=log)
+        assert loaded.seq == 3 and loaded.on_hand(buns) == 18
+        log.record_count(ledger, buns, 4)
+        loaded.catch_up(log)
+        assert loaded.consume(buns, 20) == ([(1, 4)], 16)
+    assert LotTracker.load(tmp_path / "missing.json").lots == {}
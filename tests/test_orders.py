@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from app.orders import delivery_offsets, optimize_orders, purchase_orders
+
+INF = np.inf
+
+
+def test_delivery_offsets():
+    days = np.zeros((2, 7), dtype=bool)
+    days[0, [0, 3]] = True
+    days[1, 4] = True
+    first, gap = delivery_offsets(days, weekday=1)
+    assert first.tolist() == [2, 3]
+    assert gap.tolist() == [4, 7]
+    with pytest.raises(ValueError):
+        delivery_offsets(np.zeros((1, 7), dtype=bool), 0)
+
+
+def everyday(vendors):
+    return np.ones((vendors, 7), dtype=bool)
+
+
+def test_case_pack_rounding_and_price_breaks():
+    need = np.array([[7.0, 95.0, 0.0]])
+    result = optimize_orders(
+        need, vendor=[0, 0, 0], case_pack=[6, 10, 1],
+        break_qty=[[0, INF], [0, 100], [0, INF]],
+        break_price=[[2.0, 0], [1.0, 0.8], [5.0, 0]],
+        vendor_minimum=[0], delivery_days=everyday(1))
+    assert result["qty"].tolist() == [[12, 100, 0]]
+    assert result["unit_price"][0, 1] == 0.8
+    assert result["order_value"][0, 0] == pytest.approx(24 + 80)
+
+
+def test_break_not_taken_when_overage_costs_more():
+    result = optimize_orders(
+        [[10.0]], vendor=[0], case_pack=[1],
+        break_qty=[[0, 1000]], break_price=[[1.0, 0.99]],
+        vendor_minimum=[0], delivery_days=everyday(1))
+    assert result["qty"].tolist() == [[10]]
+
+
+def test_vendor_minimum_topped_up_in_cases():
+    need = np.array([[4.0, 2.0, 6.0], [30.0, 0.0, 0.0]])
+    result = optimize_orders(
+        need, vendor=[0, 0, 1], case_pack=[2, 1, 6],
+        break_qty=[[0], [0], [0]], break_price=[[5.0], [3.0], [1.0]],
+        vendor_minimum=[100, 0], delivery_days=everyday(2),
+        daily_usage=np.array([[1.0, 1.0, 1.0], [1.0, 0.0, 0.0]]))
+    value = result["order_value"]
+    assert value[0, 0] >= 100 and value[1, 0] >= 100
+    assert result["meets_minimum"].all()
+    assert (result["qty"][:, 0] % 2 == 0).all()
+    assert result["qty"][0, 2] == 6
+    assert value[1, 1] == 0
+
+
+def test_delivery_gap_extends_need():
+    days = np.zeros((1, 7), dtype=bool)
+    days[0, [0, 3]] = True
+    result = optimize_orders(
+        [[5.0]], vendor=[0], case_pack=[1], break_qty=[[0]],
+        break_price=[[1.0]], vendor_minimum=[0], delivery_days=days,
+        weekday=6, daily_usage=[[2.0]])
+    assert result["delivery_in_days"].tolist() == [1]
+    assert result["qty"].tolist() == [[9]]
+
+
+def test_purchase_orders_and_fleet_scale():
+    rng = np.random.default_rng(2)
+    locations, items, vendors = 40, 3000, 25
+    vendor = rng.integers(0, vendors, items)
+    bq = np.tile([0, 24, INF], (items, 1))
+    bp = np.stack([np.full(items, 2.0), np.full(items, 1.8),
+                   np.zeros(items)], axis=1)
+    result = optimize_orders(
+        rng.poisson(3, (locations, items)).astype(float), vendor,
+        rng.choice([1, 6, 12], items), bq, bp,
+        rng.uniform(50, 300, vendors), everyday(vendors),
+        daily_usage=rng.uniform(0, 2, (locations, items)))
+    assert result["meets_minimum"].all()
+    orders = purchase_orders(result, vendor)
+    assert len(orders) == np.count_nonzero(result["order_value"])
+    first = orders[0]
+    assert sum(l["qty"] * l["unit_price"] for l in first["lines"]) == \
+        pytest.approx(first["total"])
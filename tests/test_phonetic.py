@@ -0,0 +1,36 @@
+from app.ledger import Ledger
+from app.phonetic import PhoneticIndex, phonetic_keys
+from app.resolver import ItemResolver
+
+
+def test_sound_alike_keys():
+    assert phonetic_keys("kale") == phonetic_keys("cale") == {"KL"}
+    assert phonetic_keys("kail") == {"KL"}
+    assert phonetic_keys("phyllo") == phonetic_keys("fillo")
+    assert phonetic_keys("cilantro") == phonetic_keys("silantro")
+    assert phonetic_keys("chorizo") & phonetic_keys("korizo")
+    assert phonetic_keys("knight") & phonetic_keys("night")
+    assert phonetic_keys("") == set()
+
+
+def test_index_lookup_and_incremental_updates():
+    ledger = Ledger()
+    kale = ledger.add_item("kale")
+    ledger.add_item("basil")
+    index = PhoneticIndex(ledger)
+    assert index.lookup("kail") == [kale]
+    cilantro = ledger.add_item("cilantro")
+    assert index.lookup("silantro") == [cilantro]
+    ledger.rename_item(kale, "lacinato kale")
+    assert index.lookup("cale") == []
+    assert index.lookup("lacinato cail") == [kale]
+
+
+def test_resolver_accepts_phonetic_matches():
+    ledger = Ledger()
+    ledger.add_item("phyllo dough")
+    ledger.add_item("filet mignon")
+    resolver = ItemResolver(ledger, min_score=0.8,
+                            phonetic=PhoneticIndex(ledger))
+    assert resolver.resolve("fillo doe") == 0
+    assert ItemResolver(ledger, min_score=0.8).resolve("fillo doe") is None
@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+from app.pipeline import Pipeline
+
+
+async def chunks(items):
+    for item in items:
+        yield item
+
+
+def test_stages_run_in_order():
+    applied = []
+    pipeline = Pipeline(
+        transcribe=lambda chunk: chunk.decode(),
+        parse=lambda text: None if text == "noise" else text.upper(),
+        apply=applied.append,
+    )
+    stats = asyncio.run(pipeline.run(chunks([b"add", b"noise", b"use"])))
+    assert applied == ["ADD", "USE"]
+    by_name = {s["stage"]: s for s in stats}
+    assert by_name["intake"]["read"] == 3
+    assert by_name["transcribe"]["processed"] == 3
+    assert by_name["parse"]["processed"] == 3
+    assert by_name["apply"]["processed"] == 2
+    assert all(s["depth"] == 0 for s in stats[1:])
+
+
+def test_slow_stage_drops_oldest_audio_instead_of_blocking():
+    applied = []
+
+    async def slow_transcribe(chunk):
+        await asyncio.sleep(0.01)
+        return chunk
+
+    async def burst():
+        for i in range(50):
+            yield i
+
+    pipeline = Pipeline(slow_transcribe, lambda x: x, applied.append,
+                        maxsize=4)
+    stats = asyncio.run(pipeline.run(burst()))
+    assert stats[0]["read"] == 50
+    assert stats[0]["dropped"] > 0
+    assert len(applied) == 50 - stats[0]["dropped"]
+    assert applied[-1] == 49
+    assert stats[1]["max_latency_ms"] > 0
+
+
+def test_handler_errors_are_counted():
+    def parse(text):
+        raise ValueError(text)
+
+    pipeline = Pipeline(lambda c: c, parse, lambda x: None)
+    stats = asyncio.run(pipeline.run(chunks(["a", "b"])))
+    assert stats[2]["errors"] == 2
+
+
+def test_blocking_handler_does_not_stall_intake():
+    reads, applied = [], []
+
+    def transcribe(chunk):
+        time.sleep(0.1)
+        return chunk
+
+    async def mic():
+        for i in range(30):
+            reads.append(time.perf_counter())
+            yield i
+            await asyncio.sleep(0.01)
+
+    pipeline = Pipeline(transcribe, lambda x: x, applied.append, maxsize=2)
+    stats = asyncio.run(pipeline.run(mic()))
+    gaps = [b - a for a, b in zip(reads, reads[1:])]
+    assert max(gaps) < 0.06
+    assert stats[0]["dropped"] > 0
+    assert applied[-1] == 29
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from app.forecast import Smoother
+from app.main import run
+from app.planning import plan_fleet
+from app.reorder import reorder_plan
+
+
+def make_inputs():
+    rng = np.random.default_rng(7)
+    usage = rng.poisson(4, (21, 5, 30)).astype(float)
+    on_hand = rng.integers(0, 40, (5, 30)).astype(float)
+    lead = rng.integers(1, 4, 30)
+    return usage, on_hand, lead
+
+
+def test_sharded_plan_matches_single_process():
+    usage, on_hand, lead = make_inputs()
+    result = plan_fleet(usage, on_hand, lead, case_pack=6, workers=3)
+    model = Smoother(0.3, 0.1, 0.2, season=7).fit(usage)
+    daily = model.forecast(7).mean(axis=0)
+    expected = reorder_plan(usage, on_hand, lead, case_pack=6,
+                            forecast=daily)
+    assert result["forecast"] == pytest.approx(daily)
+    assert result["suggested_qty"] == pytest.approx(expected["suggested_qty"])
+    assert result["reorder_point"] == pytest.approx(expected["reorder_point"])
+
+
+def test_per_location_lead_times():
+    usage, on_hand, _ = make_inputs()
+    lead = np.random.default_rng(3).integers(1, 6, (5, 30))
+    result = plan_fleet(usage, on_hand, lead, workers=2)
+    daily = Smoother(0.3, 0.1, 0.2, season=7).fit(usage).forecast(7)
+    expected = reorder_plan(usage, on_hand, lead,
+                            forecast=daily.mean(axis=0))
+    assert result["reorder_point"] == pytest.approx(expected["reorder_point"])
+
+
+def test_nightly_run_updates_saved_state():
+    usage, on_hand, lead = make_inputs()
+    model = Smoother(0.3, 0.1, 0.2, season=7).fit(usage[:-1])
+    result = plan_fleet(usage, on_hand, lead, workers=3, model=model)
+    full = Smoother(0.3, 0.1, 0.2, season=7).fit(usage)
+    assert model.t == full.t == 21
+    assert model.level == pytest.approx(full.level)
+    assert model.seasonal == pytest.approx(full.seasonal)
+    assert result["forecast"] == pytest.approx(full.forecast(7).mean(axis=0))
+    with pytest.raises(ValueError):
+        plan_fleet(usage[:, :2], on_hand[:2], lead, model=model)
+
+
+def test_more_workers_than_locations():
+    usage, on_hand, lead = make_inputs()
+    result = plan_fleet(usage[:, :2], on_hand[:2], lead, workers=8)
+    assert result["suggested_qty"].shape == (2, 30)
+
+
+def test_plan_subcommand(tmp_path):
+    usage, on_hand, lead = make_inputs()
+    np.savez(tmp_path / "fleet.npz", usage=usage, on_hand=on_hand,
+             lead_days=lead)
+    ledger, log = run(["--data-dir", str(tmp_path / "data"), "plan",
+                       str(tmp_path / "fleet.npz"), "--out",
+                       str(tmp_path / "plan.npz"), "--workers", "2"])
+    log.close()
+    with np.load(tmp_path / "plan.npz") as plan:
+        assert plan["suggested_qty"].shape == (5, 30)
+    state = tmp_path / "data" / "forecast.npz"
+    assert Smoother.load(state).t == 21
+    ledger, log = run(["--data-dir", str(tmp_path / "data"), "plan",
+                       str(tmp_path / "fleet.npz"), "--out",
+                       str(tmp_path / "plan.npz")])
+    log.close()
+    assert Smoother.load(state).t == 22
@@ -0,0 +1,102 @@
+import threading
+import time
+
+import pytest
+
+from app.ledger import Ledger
+from app.pool import ConnectionPool
+from app.storage import SqliteStore
+
+
+def make_store(tmp_path, readers=2):
+    ledger = Ledger()
+    ledger.add_item("butter", qty=5)
+    store = SqliteStore(str(tmp_path / "stock.db"), readers=readers)
+    store.save_catalog(ledger)
+    return store
+
+
+def test_nested_reads_reuse_the_threads_connection(tmp_path):
+    store = make_store(tmp_path)
+    pool = store.pool
+    with pool.reader() as outer:
+        with pool.reader() as inner:
+            assert inner is outer
+        assert pool.stats()["idle_readers"] == 1
+    assert pool.stats()["idle_readers"] == 2
+    assert pool.stats()["read"]["acquired"] == 1
+    store.close()
+
+
+def test_waits_are_measured_when_readers_run_out(tmp_path):
+    store = make_store(tmp_path, readers=1)
+    pool = store.pool
+    holding = threading.Event()
+
+    def hold():
+        with pool.reader():
+            holding.set()
+            time.sleep(0.05)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    holding.wait()
+    assert store.quantity(0) == 5
+    thread.join()
+    stats = pool.stats()["read"]
+    assert stats["waited"] >= 1
+    assert stats["max_wait_ms"] >= 20
+    store.close()
+
+
+def test_timeout_when_no_reader_frees_up(tmp_path):
+    make_store(tmp_path).close()
+    pool = ConnectionPool(str(tmp_path / "stock.db"), readers=1, timeout=0.05)
+    with pool.reader():
+        errors = []
+
+        def starved():
+            try:
+                with pool.reader():
+                    pass
+            except TimeoutError as exc:
+                errors.append(exc)
+
+        thread = threading.Thread(target=starved)
+        thread.start()
+        thread.join()
+    assert len(errors) == 1
+    pool.close()
+
+
+def test_concurrent_readers_and_voice_writes(tmp_path):
+    store = make_store(tmp_path, readers=4)
+    ledger = store.load_ledger()
+    stop = threading.Event()
+    seen = []
+
+    def report():
+        while not stop.is_set():
+            seen.append(store.quantity(0))
+
+    threads = [threading.Thread(target=report) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for _ in range(200):
+        store.record(ledger, 0, 1)
+    store.flush()
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert store.quantity(0) == 205
+    assert seen and all(5 <= q <= 205 for q in seen)
+    assert store.pool.stats()["write"]["acquired"] >= 2
+    store.close()
+
+
+def test_closed_pool_rejects_writes(tmp_path):
+    store = make_store(tmp_path)
+    store.close()
+    with pytest.raises(Exception):
+        with store.pool.writer() as conn:
+            conn.execute("SELECT 1")
@@ -0,0 +1,120 @@
+import time
+
+import numpy as np
+import pytest
+
+from app.ledger import Ledger
+from app.recipes import RecipeBook
+from app.txlog import TransactionLog
+
+
+def make_book():
+    ledger = Ledger()
+    bun = ledger.add_item("buns", qty=200)
+    patty = ledger.add_item("patties", qty=200)
+    cheese = ledger.add_item("cheese slices", qty=300)
+    fries = ledger.add_item("fries", unit="lb", qty=100)
+    book = RecipeBook(ledger)
+    burger = book.add_dish("Burger")
+    cheeseburger = book.add_dish("Cheeseburger")
+    side = book.add_dish("Fries")
+    book.set_component(burger, bun, 1)
+    book.set_component(burger, patty, 1)
+    book.set_component(cheeseburger, bun, 1)
+    book.set_component(cheeseburger, patty, 2)
+    book.set_component(cheeseburger, cheese, 2)
+    book.set_component(side, fries, 0.4)
+    return ledger, book
+
+
+def test_depletion_is_sales_times_bom():
+    ledger, book = make_book()
+    sales = book.sales_vector([0, 1, 2, 0], [100, 20, 50, 20])
+    assert sales.tolist() == [120, 20, 50]
+    usage = book.depletion(sales)
+    assert usage.tolist() == pytest.approx([140, 160, 40, 20])
+
+
+def test_deplete_logs_one_batch(tmp_path):
+    ledger, book = make_book()
+    with TransactionLog(tmp_path / "stock.log") as log:
+        book.deplete(log, book.sales_vector([0], [120]))
+        assert len(log) == 2
+    assert ledger.qty.tolist() == [80, 80, 300, 100]
+
+
+def test_recompiles_after_edits():
+    ledger, book = make_book()
+    book.depletion(book.sales_vector([2], [1]))
+    book.set_component(book.dish_id("fries"), 3, 0.5)
+    book.set_component(book.dish_id("burger"), 1, 0)
+    usage = book.depletion(book.sales_vector([0, 2], [1, 1]))
+    assert usage.tolist() == [1, 0, 0, 0.5]
+
+
+def test_full_menu_depletion_is_fast():
+    rng = np.random.default_rng(0)
+    ledger = Ledger()
+    for i in range(3000):
+        ledger.add_item(f"ingredient {i}")
+    book = RecipeBook(ledger)
+    for d in range(400):
+        dish = book.add_dish(f"dish {d}")
+        for item in rng.choice(3000, 12, replace=False):
+            book.set_component(dish, int(item), 0.25)
+    book.matrix()
+    sales = rng.integers(0, 200, 400)
+    start = time.perf_counter()
+    usage = book.depletion(sales)
+    assert time.perf_counter() - start < 0.01
+    assert usage.sum() == pytest.approx(sales.sum() * 12 * 0.25)
+
+
+def make_nested():
+    ledger = Ledger()
+    for name in ["buns", "patties", "mayo", "pickles", "spices", "onions"]:
+        ledger.add_item(name, qty=1000)
+    book = RecipeBook(ledger)
+    burger, sauce, relish, plate = (
+        book.add_dish(n) for n in ["burger", "house sauce", "relish",
+                                   "burger plate"])
+    book.set_component(burger, 0, 1)
+    book.set_component(burger, 1, 1)
+    book.set_prep(burger, sauce, 0.5)
+    book.set_component(sauce, 2, 2)
+    book.set_prep(sauce, relish, 1)
+    book.set_component(relish, 3, 1)
+    book.set_component(relish, 4, 0.1)
+    book.set_prep(plate, burger, 2)
+    book.set_prep(plate, sauce, 1)
+    return ledger, book
+
+
+def test_nested_preps_flatten_to_raw_ingredients():
+    ledger, book = make_nested()
+    assert book.flat(0) == pytest.approx(
+        {0: 1, 1: 1, 2: 1, 3: 0.5, 4: 0.05})
+    assert book.flat(3) == pytest.approx(
+        {0: 2, 1: 2, 2: 4, 3: 2, 4: 0.2})
+    usage = book.depletion(book.sales_vector([0, 3], [10, 1]))
+    assert usage.tolist() == pytest.approx([12, 12, 14, 7, 0.7, 0])
+
+
+def test_edits_invalidate_only_downstream_dishes():
+    ledger, book = make_nested()
+    book.matrix()
+    other = book.add_dish("side salad")
+    book.set_component(other, 5, 1)
+    book.matrix()
+    book.set_component(book.dish_id("relish"), 5, 0.2)
+    assert book._flat[other] is not None
+    assert all(book._flat[d] is None for d in range(4))
+    assert book.flat(3)[5] == pytest.approx(0.4)
+
+
+def test_cycles_are_rejected():
+    ledger, book = make_nested()
+    with pytest.raises(ValueError):
+        book.set_prep(book.dish_id("relish"), book.dish_id("burger"), 1)
+    with pytest.raises(ValueError):
+        book.set_prep(0, 0, 1)
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from app.ledger import Ledger
+from app.reorder import reorder_plan, service_z, stack_ledgers
+
+
+def test_service_z():
+    assert service_z(0.5) == pytest.approx(0, abs=1e-9)
+    assert service_z(0.95) == pytest.approx(1.6449, abs=1e-3)
+    with pytest.raises(ValueError):
+        service_z(1.0)
+
+
+def test_plan_matches_textbook_formulas():
+    usage = np.array([[[10, 1]], [[12, 1]], [[8, 1]], [[10, 1]]], float)
+    on_hand = np.array([[5, 50]], float)
+    plan = reorder_plan(usage, on_hand, lead_days=2, review_days=1,
+                        service_level=0.95, case_pack=np.array([6, 1]))
+    std = np.std([10, 12, 8, 10], ddof=1)
+    safety = service_z(0.95) * std * np.sqrt(3)
+    assert plan["safety_stock"][0, 0] == pytest.approx(safety)
+    assert plan["reorder_point"][0, 0] == pytest.approx(20 + safety)
+    need = 30 + safety - 5
+    assert plan["suggested_qty"][0, 0] == np.ceil(need / 6) * 6
+    assert plan["suggested_qty"][0, 1] == 0
+
+
+def test_on_order_counts_toward_position():
+    usage = np.full((7, 2, 1), 4.0)
+    plan = reorder_plan(usage, on_hand=[[0], [0]], lead_days=1,
+                        on_order=[[0], [8]])
+    assert plan["suggested_qty"].ravel().tolist() == [8, 0]
+
+
+def test_fleet_shapes():
+    rng = np.random.default_rng(1)
+    usage = rng.poisson(3, (28, 40, 3000)).astype(float)
+    on_hand = rng.integers(0, 30, (40, 3000))
+    lead = rng.integers(1, 4, 3000)
+    plan = reorder_plan(usage, on_hand, lead_days=lead)
+    assert plan["suggested_qty"].shape == (40, 3000)
+    assert (plan["suggested_qty"] >= 0).all()
+
+
+def test_stack_ledgers():
+    a, b = Ledger(), Ledger()
+    for ledger, qty in ((a, 3), (b, 7)):
+        ledger.add_item("flour", par=10, qty=qty)
+    qty, par = stack_ledgers([a, b])
+    assert qty.tolist() == [[3], [7]]
+    b.add_item("salt")
+    with pytest.raises(ValueError):
+        stack_ledgers([a, b])
@@ -0,0 +1,152 @@
+import threading
+
+from app.ledger import Ledger
+from app.main import run
+from app.replicate import (ReplicationServer, Replica, SnapshotWatch,
+                           apply_from_dir, ship, ship_to_dir)
+from app.snapshot import Snapshotter
+from app.txlog import OP_SET, TransactionLog
+
+
+def fill(log, ledger):
+    log.record(ledger, 0, 10)
+    log.record(ledger, 1, 4)
+    log.record_count(ledger, 0, 7)
+
+
+def make_store(tmp_path):
+    ledger = Ledger()
+    ledger.add_item("butter")
+    ledger.add_item("flour")
+    return ledger, TransactionLog(tmp_path / "store.log")
+
+
+def test_replica_skips_records_it_already_has(tmp_path):
+    ledger, log = make_store(tmp_path)
+    fill(log, ledger)
+    replica = Replica(str(tmp_path / "hq"), "downtown")
+    assert replica.apply(log.records(0)[:2]) == 2
+    assert replica.apply(log.records(0)) == 3
+    assert replica.ledger.qty.tolist() == [7, 4]
+    replica.close()
+    reopened = Replica(str(tmp_path / "hq"), "downtown")
+    assert reopened.offset == 3
+    assert reopened.ledger.qty.tolist() == [7, 4]
+    reopened.close()
+    log.close()
+
+
+def test_socket_shipping_resumes_from_receiver_offset(tmp_path):
+    ledger, log = make_store(tmp_path)
+    fill(log, ledger)
+    server = ReplicationServer(("127.0.0.1", 0), str(tmp_path / "hq"))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        address = server.server_address
+        assert ship(log, address, "downtown", batch=2, follow=False) == 3
+        log.record(ledger, 1, -1)
+        log.append(0, 2, op=OP_SET)
+        assert ship(log, address, "downtown", follow=False) == 5
+        replica = server.replica("downtown")
+        assert replica.ledger.qty.tolist() == [2, 3]
+    finally:
+        server.shutdown()
+        server.server_close()
+        log.close()
+
+
+def test_shared_directory_shipping(tmp_path):
+    ledger, log = make_store(tmp_path)
+    shared = tmp_path / "shared"
+    log.record(ledger, 0, 5)
+    offset = ship_to_dir(log, str(shared), "uptown", 0)
+    fill(log, ledger)
+    offset = ship_to_dir(log, str(shared), "uptown", offset)
+    assert offset == 4
+    assert ship_to_dir(log, str(shared), "uptown", offset) == 4
+    replica = Replica(str(tmp_path / "hq"), "uptown")
+    assert apply_from_dir(str(shared), replica) == 4
+    assert replica.ledger.qty.tolist() == [7, 4]
+    assert list((shared / "uptown").iterdir()) == []
+    replica.close()
+    log.close()
+
+
+def test_sender_sees_records_written_by_another_handle(tmp_path):
+    ledger, writer = make_store(tmp_path)
+    sender = TransactionLog(tmp_path / "store.log")
+    shared = str(tmp_path / "shared")
+    assert ship_to_dir(sender, shared, "midtown", 0) == 0
+    fill(writer, ledger)
+    assert len(sender) == 0
+    assert ship_to_dir(sender, shared, "midtown", 0) == 3
+    writer.record(ledger, 1, 2)
+    replica = Replica(str(tmp_path / "hq"), "midtown")
+    server = ReplicationServer(("127.0.0.1", 0), str(tmp_path / "hq"))
+    server.replicas["midtown"] = replica
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        assert ship(sender, server.server_address, "midtown",
+                    follow=False) == 4
+        assert replica.ledger.qty.tolist() == [7, 6]
+    finally:
+        server.shutdown()
+        server.server_close()
+    sender.close()
+    writer.close()
+
+
+def test_replicate_subcommand_over_directory(tmp_path):
+    store = tmp_path / "store"
+    store.mkdir()
+    with TransactionLog(store / "stock.log") as log:
+        log.append(0, 3)
+    shared, root = str(tmp_path / "shared"), str(tmp_path / "hq")
+    run(["--data-dir", str(store), "replicate", "send",
+         "--dir", shared, "--store", "s1", "--once"])
+    run(["--data-dir", str(tmp_path / "hqdata"), "replicate",
+         "receive", "--dir", shared, "--root", root, "--once"])
+    replica = Replica(root, "s1")
+    assert replica.ledger.qty.tolist() == [3]
+    replica.close()
+    assert sorted(p.name for p in store.iterdir()) == ["replicate.offset",
+                                                       "stock.log"]
+
+
+def test_replica_gets_the_store_catalog(tmp_path):
+    store = tmp_path / "store"
+    store.mkdir()
+    ledger, log = Ledger(), TransactionLog(store / "stock.log")
+    snapshotter = Snapshotter(str(store))
+    snapshotter.watch(ledger, log)
+    ledger.add_item("butter", unit="lb", par=4, qty=10)
+    log.record(ledger, 0, -3)
+    ledger.add_item("flour", unit="oz", qty=2)
+    log.record_par(ledger, 1, 5)
+    shared, root = str(tmp_path / "shared"), str(tmp_path / "hq")
+    run(["--data-dir", str(store), "replicate", "send",
+         "--dir", shared, "--store", "s1", "--once"])
+    run(["--data-dir", str(tmp_path / "hqdata"), "replicate",
+         "receive", "--dir", shared, "--root", root, "--once"])
+    replica = Replica(root, "s1")
+    assert replica.ledger.names == ["butter", "flour"]
+    assert replica.ledger.qty.tolist() == [7, 2]
+    assert replica.ledger.par.tolist() == [4, 5]
+    assert replica.ledger.unit.tolist() == [1, 2]
+    replica.close()
+
+    ledger.rename_item(1, "bread flour")
+    server = ReplicationServer(("127.0.0.1", 0), root)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        ship(log, server.server_address, "s1", follow=False,
+             snapshot=SnapshotWatch(str(store / "stock.snap")))
+        assert server.replica("s1").ledger.names == ["butter", "bread flour"]
+    finally:
+        server.shutdown()
+        server.server_close()
+    snapshotter.close()
+    log.close()
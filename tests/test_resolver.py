@@ -0,0 +1,58 @@
+import time
+
+from app.intents import IntentParser
+from app.ledger import Ledger
+from app.resolver import ItemResolver, edit_distance
+
+
+def make_ledger():
+    ledger = Ledger()
+    for name in ["romaine", "mozzarella", "parmesan", "ricotta",
+                 "roma tomatoes", "red onions", "yellow onions"]:
+        ledger.add_item(name)
+    return ledger
+
+
+def test_edit_distance():
+    assert edit_distance("kitten", "sitting") == 3
+    assert edit_distance("", "abc") == 3
+    assert edit_distance("same", "same") == 0
+
+
+def test_resolves_misspellings():
+    ledger = make_ledger()
+    resolver = ItemResolver(ledger)
+    assert resolver.resolve("rommaine") == ledger.item_id("romaine")
+    assert resolver.resolve("mozzerella") == ledger.item_id("mozzarella")
+    assert resolver.resolve("yelow onion") == ledger.item_id("yellow onions")
+    assert resolver.resolve("xylophone") is None
+
+
+def test_index_follows_catalog_edits():
+    ledger = make_ledger()
+    resolver = ItemResolver(ledger)
+    burrata = ledger.add_item("burrata")
+    assert resolver.resolve("burata") == burrata
+    ledger.rename_item(burrata, "stracciatella")
+    assert resolver.resolve("burata") is None
+    assert resolver.resolve("straciatella") == burrata
+
+
+def test_parser_falls_back_to_resolver():
+    ledger = make_ledger()
+    parser = IntentParser(ledger, resolver=ItemResolver(ledger))
+    intent = parser("used two pounds of mozzerella")
+    assert intent.item == ledger.item_id("mozzarella")
+    assert intent.quantity == 2
+
+
+def test_lookup_cost_is_independent_of_catalog_scan():
+    ledger = Ledger()
+    for i in range(5000):
+        ledger.add_item(f"sku {i:05d} widget")
+    ledger.add_item("mozzarella")
+    resolver = ItemResolver(ledger)
+    start = time.perf_counter()
+    for _ in range(100):
+        assert resolver.resolve("mozzerela") == 5000
+    assert (time.perf_counter() - start) / 100 < 0.005
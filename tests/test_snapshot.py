@@ -0,0 +1,116 @@
+import time
+
+import app.snapshot
+from app.ledger import Ledger
+from app.snapshot import (SNAPSHOT_NAME, Snapshotter, load_snapshot,
+                          recover, write_snapshot)
+from app.txlog import OP_SET, TransactionLog
+
+
+def test_snapshot_round_trip(tmp_path):
+    ledger = Ledger()
+    ledger.add_item("butter", unit="lb", par=10, qty=4)
+    ledger.add_item("tomatoes", unit="case", par=2, qty=5)
+    path = tmp_path / SNAPSHOT_NAME
+    write_snapshot(path, ledger.columns(), seq=7)
+    loaded, seq = load_snapshot(path)
+    assert seq == 7
+    assert loaded.names == ["butter", "tomatoes"]
+    assert loaded.qty.tolist() == [4, 5]
+    assert loaded.par.tolist() == [10, 2]
+    assert loaded.item(1)["unit"] == "case"
+    assert loaded.item_id("Tomatoes") == 1
+    loaded.adjust(0, 1)
+
+
+def test_recover_replays_only_tail(tmp_path):
+    ledger = Ledger()
+    ledger.add_item("butter")
+    with TransactionLog(tmp_path / "stock.log") as log:
+        log.record(ledger, 0, 5)
+        log.record(ledger, 0, 5)
+        snapshotter = Snapshotter(str(tmp_path), every_records=2)
+        assert snapshotter.maybe_snapshot(ledger, log) is not None
+        snapshotter.close()
+        log.record(ledger, 0, -3)
+        log.record_count(ledger, 0, 40)
+
+    recovered, log, stats = recover(str(tmp_path))
+    log.close()
+    assert stats["snapshot_seq"] == 2
+    assert stats["replayed"] == 2
+    assert recovered.qty.tolist() == [40]
+    assert recovered.item_id("butter") == 0
+
+
+def test_recover_cold_start_is_fast(tmp_path):
+    ledger = Ledger()
+    for i in range(3000):
+        ledger.add_item(f"sku {i}", par=5, qty=i)
+    with TransactionLog(tmp_path / "stock.log") as log:
+        for _ in range(20):
+            log.append_many(range(3000), [1.0] * 3000)
+        write_snapshot(tmp_path / SNAPSHOT_NAME, ledger.columns(), len(log))
+        log.append(0, 1.0, op=OP_SET)
+    start = time.perf_counter()
+    recovered, log, stats = recover(str(tmp_path))
+    assert time.perf_counter() - start < 0.2
+    log.close()
+    assert stats["replayed"] == 1
+    assert recovered.qty[0] == 1 and recovered.qty[2999] == 2999
+
+
+def test_catalog_edits_survive_a_crash(tmp_path):
+    ledger = Ledger()
+    log = TransactionLog(tmp_path / "stock.log")
+    snapshotter = Snapshotter(str(tmp_path))
+    snapshotter.watch(ledger, log)
+    butter = ledger.add_item("butter", unit="lb")
+    log.record(ledger, butter, 4)
+    log.record_par(ledger, butter, 10)
+    ledger.add_item("romaine", unit="case")
+    ledger.rename_item(butter, "unsalted butter")
+    log.close()
+
+    recovered, log, stats = recover(str(tmp_path))
+    log.close()
+    assert recovered.names == ["unsalted butter", "romaine"]
+    assert recovered.item(1)["unit"] == "case"
+    assert recovered.qty.tolist() == [4, 0]
+    assert recovered.par.tolist() == [10, 0]
+
+
+def test_snapshot_ahead_of_log_keeps_catalog(tmp_path):
+    ledger = Ledger()
+    ledger.add_item("butter", unit="lb", par=6, qty=50)
+    write_snapshot(tmp_path / SNAPSHOT_NAME, ledger.columns(), seq=9)
+    with TransactionLog(tmp_path / "stock.log") as log:
+        log.append(0, 3)
+    recovered, log, stats = recover(str(tmp_path))
+    log.close()
+    assert stats["snapshot_seq"] == 0
+    assert recovered.item(0) == {"id": 0, "name": "butter", "qty": 3.0,
+                                 "par": 6.0, "unit": "lb"}
+
+
+def test_bulk_catalog_load_writes_one_snapshot(tmp_path, monkeypatch):
+    writes = []
+    real = app.snapshot.write_snapshot
+    monkeypatch.setattr(app.snapshot, "write_snapshot",
+                        lambda *a: writes.append(1) or real(*a))
+    ledger = Ledger()
+    log = TransactionLog(tmp_path / "stock.log")
+    snapshotter = Snapshotter(str(tmp_path))
+    snapshotter.watch(ledger, log)
+    with snapshotter.batch(ledger, log):
+        for i in range(3000):
+            ledger.add_item(f"sku {i}", par=5)
+        assert snapshotter.due(log)
+    assert len(writes) == 1
+    ledger.rename_item(0, "sku zero")
+    assert len(writes) == 2
+    snapshotter.close()
+    log.close()
+    recovered, log, _ = recover(str(tmp_path))
+    log.close()
+    assert len(recovered) == 3000 and recovered.names[0] == "sku zero"
@@ -0,0 +1,58 @@
+import asyncio
+
+from app.pipeline import Pipeline
+from app.speech import FixtureEngine, Transcriber, fake_pcm
+
+
+def chunked(pcm, size):
+    return [pcm[i:i + size] for i in range(0, len(pcm), size)]
+
+
+def test_partials_then_final():
+    engine = FixtureEngine.from_texts(["add two cases of tomatoes",
+                                       "add two pounds of butter"])
+    results = []
+    for chunk in chunked(fake_pcm("add two cases of tomatoes"), 3200):
+        results.extend(engine.feed(chunk))
+    partials = [t.text for t in results if not t.final]
+    finals = [t.text for t in results if t.final]
+    assert finals == ["add two cases of tomatoes"]
+    assert partials and "add two cases of tomatoes".startswith(partials[0])
+    assert len(partials) == len(set(partials))
+
+
+def test_back_to_back_utterances_in_one_chunk():
+    engine = FixtureEngine.from_texts(["used butter", "86 the salmon"])
+    pcm = fake_pcm("used butter") + fake_pcm("86 the salmon")
+    finals = [t.text for t in engine.feed(pcm) if t.final]
+    assert finals == ["used butter", "86 the salmon"]
+
+
+def test_unknown_audio_is_discarded():
+    engine = FixtureEngine.from_texts(["used butter"])
+    assert engine.feed(b"\x00\x01" * 100) == []
+    pcm = fake_pcm("used butter")
+    assert [t.text for t in engine.feed(pcm)] == ["used butter"]
+
+
+def test_fixtures_from_dir(tmp_path):
+    (tmp_path / "butter.pcm").write_bytes(fake_pcm("used four pounds of butter"))
+    (tmp_path / "butter.txt").write_text("used four pounds of butter\n")
+    engine = FixtureEngine.from_dir(tmp_path)
+    finals = engine.feed(fake_pcm("used four pounds of butter"))
+    assert finals[-1].final and finals[-1].text == "used four pounds of butter"
+
+
+def test_transcriber_in_pipeline():
+    texts = ["add two cases of tomatoes", "86 the salmon"]
+    partials, applied = [], []
+    transcribe = Transcriber(FixtureEngine.from_texts(texts), partials.append)
+
+    async def mic():
+        for text in texts:
+            for chunk in chunked(fake_pcm(text), 3200):
+                yield chunk
+
+    asyncio.run(Pipeline(transcribe, lambda t: t, applied.append).run(mic()))
+    assert applied == texts
+    assert partials
@@ -0,0 +1,192 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from app.ledger import Ledger
+from app.pool import connect
+from app.storage import SqliteStore
+
+
+def make_ledger():
+    ledger = Ledger()
+    ledger.add_item("butter", unit="lb", par=10, qty=20)
+    ledger.add_item("flour", unit="lb", par=50, qty=40)
+    return ledger
+
+
+def test_round_trip_through_sqlite(tmp_path):
+    path = str(tmp_path / "stock.db")
+    ledger = make_ledger()
+    with SqliteStore(path) as store:
+        store.save_catalog(ledger)
+        store.record(ledger, 0, -4)
+        store.record_many(ledger, [1, 1], [5, -1])
+        store.record_count(ledger, 0, 12)
+        store.record(ledger, 0, 1)
+        store.record_par(ledger, 1, 60)
+        assert len(store) == 6
+    with SqliteStore(path) as store:
+        loaded = store.load_ledger()
+        assert len(store) == 6
+    assert loaded.names == ["butter", "flour"]
+    assert loaded.qty.tolist() == [13, 44]
+    assert loaded.par.tolist() == [10, 60]
+    assert loaded.item(0)["unit"] == "lb"
+    assert journal_mode(path) == "wal"
+
+
+def journal_mode(path):
+    conn = connect(path)
+    try:
+        return conn.execute("PRAGMA journal_mode").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_group_commit_batches_movements(tmp_path):
+    ledger = make_ledger()
+    with SqliteStore(str(tmp_path / "stock.db"), commit_interval=0.2,
+                     batch_size=1000) as store:
+        store.save_catalog(ledger)
+        for _ in range(300):
+            store.record(ledger, 0, 1)
+        assert store.commits == 0
+        deadline = time.monotonic() + 5
+        while store.commits == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert store.commits == 1
+        assert store.quantity(0) == 320
+
+
+def test_full_batch_commits_without_waiting_for_the_interval(tmp_path):
+    ledger = make_ledger()
+    with SqliteStore(str(tmp_path / "stock.db"), commit_interval=60,
+                     batch_size=10) as store:
+        store.save_catalog(ledger)
+        store.record_many(ledger, [0] * 10, [1] * 10)
+        deadline = time.monotonic() + 5
+        while store.commits == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert store.commits == 1
+        assert store.quantity(0) == 30
+
+
+def test_full_batch_on_a_locked_database_does_not_raise(tmp_path):
+    path = str(tmp_path / "stock.db")
+    ledger = make_ledger()
+    with SqliteStore(path, commit_interval=60, batch_size=2) as store:
+        store.save_catalog(ledger)
+        other = lock_database(path)
+        start = time.perf_counter()
+        store.record_many(ledger, [0, 1], [1, 1])
+        assert time.perf_counter() - start < 0.1
+        other.execute("ROLLBACK")
+        other.close()
+        store.flush()
+        assert store.quantity(0) == 21 and store.quantity(1) == 41
+
+
+def test_readers_run_while_writer_holds_a_transaction(tmp_path):
+    path = str(tmp_path / "stock.db")
+    ledger = make_ledger()
+    with SqliteStore(path) as store:
+        store.save_catalog(ledger)
+        with store.pool.writer() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("UPDATE items SET qty = 0")
+            result = []
+            reader = threading.Thread(
+                target=lambda: result.append(store.quantity(1)))
+            reader.start()
+            reader.join(timeout=2)
+            conn.execute("COMMIT")
+    assert result == [40]
+
+
+def lock_database(path):
+    conn = connect(path)
+    conn.execute("BEGIN IMMEDIATE")
+    return conn
+
+
+def test_busy_database_keeps_movements_pending(tmp_path):
+    path = str(tmp_path / "stock.db")
+    ledger = make_ledger()
+    with SqliteStore(path, commit_interval=60) as store:
+        store.save_catalog(ledger)
+        with store.pool.writer() as conn:
+            conn.execute("PRAGMA busy_timeout=50")
+        other = lock_database(path)
+        store.record(ledger, 0, 5)
+        with pytest.raises(sqlite3.OperationalError):
+            store.flush()
+        assert len(store) == 1 and store._pending
+        other.execute("ROLLBACK")
+        other.close()
+        store.flush()
+        assert store.quantity(0) == 25
+
+
+def test_appends_do_not_wait_for_a_blocked_commit(tmp_path):
+    path = str(tmp_path / "stock.db")
+    ledger = make_ledger()
+    with SqliteStore(path, commit_interval=0.01) as store:
+        store.save_catalog(ledger)
+        with store.pool.writer() as conn:
+            conn.execute("PRAGMA busy_timeout=2000")
+        other = lock_database(path)
+        store.record(ledger, 0, 1)
+        time.sleep(0.2)
+        start = time.perf_counter()
+        store.record(ledger, 0, 1)
+        assert time.perf_counter() - start < 0.1
+        assert len(store) == 2
+        other.execute("ROLLBACK")
+        other.close()
+        deadline = time.monotonic() + 5
+        while store.quantity(0) != 22 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert store.quantity(0) == 22
+
+
+def test_writer_timeout_keeps_movements_and_flusher(tmp_path):
+    ledger = make_ledger()
+    with SqliteStore(str(tmp_path / "stock.db"),
+                     commit_interval=0.01) as store:
+        store.save_catalog(ledger)
+        store.pool.timeout = 0.05
+        held, release = threading.Event(), threading.Event()
+
+        def hold_writer():
+            with store.pool.writer():
+                held.set()
+                release.wait()
+
+        holder = threading.Thread(target=hold_writer)
+        holder.start()
+        held.wait()
+        store.record(ledger, 1, 3)
+        with pytest.raises(TimeoutError):
+            store.flush()
+        deadline = time.monotonic() + 5
+        while store.last_error is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert isinstance(store.last_error, TimeoutError)
+        assert store._flusher.is_alive() and len(store) == 1
+        release.set()
+        holder.join()
+        while store.commits == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert store.quantity(1) == 43
+
+
+def test_resume_mark_commits_with_its_movements(tmp_path):
+    ledger = make_ledger()
+    with SqliteStore(str(tmp_path / "stock.db")) as store:
+        store.save_catalog(ledger)
+        assert store.last_mark(7) == 0
+        store.record_many(ledger, [0, 1], [-1, -2], mark=(7, 120))
+        assert store.last_mark(7) == 120
+        assert store.quantity(0) == 19 and store.quantity(1) == 38
@@ -0,0 +1,72 @@
+import os
+
+from app.ledger import Ledger
+from app.main import run
+from app.txlog import OP_PAR, OP_SET, RECORD, HEADER_SIZE, TransactionLog
+
+
+def test_append_and_replay(tmp_path):
+    path = tmp_path / "stock.log"
+    ledger = Ledger()
+    butter = ledger.add_item("butter", unit="lb", qty=0)
+    with TransactionLog(path) as log:
+        log.record(ledger, butter, 10)
+        log.record(ledger, butter, -4)
+        log.append_many([butter, butter], [1.5, 0.5])
+        assert len(log) == 4
+        assert log.records()["seq"].tolist() == [0, 1, 2, 3]
+
+    fresh = Ledger()
+    fresh.add_item("butter", unit="lb")
+    with TransactionLog(path) as log:
+        assert log.replay(fresh) == 4
+    assert fresh.qty[butter] == 8
+
+
+def test_counts_override_earlier_deltas(tmp_path):
+    with TransactionLog(tmp_path / "stock.log") as log:
+        log.append(0, 5)
+        log.append(1, 3)
+        log.append(0, 20, op=OP_SET)
+        log.append(0, -2)
+        log.append(1, 1)
+        ledger = Ledger()
+        log.replay(ledger)
+        assert ledger.qty.tolist() == [18, 4]
+        tail = Ledger()
+        assert log.replay(tail, start=3) == 2
+        assert tail.qty.tolist() == [-2, 1]
+
+
+def test_torn_record_is_dropped(tmp_path):
+    path = tmp_path / "stock.log"
+    with TransactionLog(path) as log:
+        log.append(0, 1)
+        log.append(0, 1)
+    with open(path, "ab") as f:
+        f.write(b"\x01" * 7)
+    with TransactionLog(path) as log:
+        assert len(log) == 2
+    assert os.path.getsize(path) == HEADER_SIZE + 2 * RECORD.itemsize
+
+
+def test_run_reports_replay(tmp_path, capsys):
+    with TransactionLog(tmp_path / "stock.log") as log:
+        log.append(0, 3)
+    ledger, log = run(["--data-dir", str(tmp_path)])
+    log.close()
+    assert ledger.qty.tolist() == [3]
+    assert "replayed 1 log records" in capsys.readouterr().out
+
+
+def test_par_edits_replay_without_touching_stock(tmp_path):
+    with TransactionLog(tmp_path / "stock.log") as log:
+        log.append(0, 5)
+        log.append(0, 8, op=OP_PAR)
+        log.append(0, 12, op=OP_PAR)
+        log.append(0, 7, op=OP_SET)
+        log.append(0, 1)
+        ledger = Ledger()
+        log.replay(ledger)
+    assert ledger.qty.tolist() == [8]
+    assert ledger.par.tolist() == [12]
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from app.ledger import UNITS, Ledger
+from app.units import UnitTable
+
+
+def make_table():
+    ledger = Ledger()
+    ledger.add_item("butter", unit="lb", qty=10)
+    ledger.add_item("tomatoes", unit="case", qty=2)
+    ledger.add_item("eggs", unit="ea", qty=30)
+    ledger.add_item("crushed tomatoes", unit="#10", qty=6)
+    return ledger, UnitTable(ledger)
+
+
+def test_standard_conversions():
+    ledger, units = make_table()
+    assert units.convert_one(0, 2, "lb", "oz") == pytest.approx(32)
+    assert units.convert_one(0, 8, "oz", "lb") == pytest.approx(0.5)
+    with pytest.raises(ValueError):
+        units.convert_one(0, 1, "qt", "lb")
+    with pytest.raises(ValueError):
+        units.convert_one(1, 1, "lb", "case")
+
+
+def test_packs():
+    ledger, units = make_table()
+    units.set_pack(1, "case", 25, "lb")
+    units.set_pack(3, "#10", 3.25, "qt")
+    units.set_pack(2, "case", 180, "ea")
+    assert units.convert_one(1, 50, "lb", "case") == pytest.approx(2)
+    assert units.convert_one(1, 1, "case", "oz") == pytest.approx(400)
+    assert units.convert_one(2, 1, "case", "ea") == 180
+    assert units.convert_one(3, 6.5, "qt", "#10") == pytest.approx(2)
+    with pytest.raises(ValueError):
+        units.set_pack(0, "case", 4, "qt")
+    with pytest.raises(ValueError):
+        units.set_pack(0, "lb", 4, "oz")
+
+
+def test_column_conversion_and_valuation():
+    ledger, units = make_table()
+    units.set_pack(1, "case", 25, "lb")
+    units.set_pack(3, "#10", 3.25, "qt")
+    ids = [0, 0, 1]
+    lb, oz, case = (UNITS.index(u) for u in ("lb", "oz", "case"))
+    out = units.convert(ids, [1, 16, 1], [lb, oz, case], [oz, lb, lb])
+    assert out == pytest.approx([16, 1, 25])
+    fleet = np.vstack([ledger.qty, ledger.qty * 2])
+    base = units.to_base(fleet)
+    assert base.shape == (2, 4)
+    assert base[0, 0] == pytest.approx(10 * 453.59237)
+    assert base[1, 2] == 60
+
+
+def test_table_tracks_new_items():
+    ledger, units = make_table()
+    flour = ledger.add_item("flour", unit="lb")
+    assert units.convert_one(flour, 1, "lb", "oz") == pytest.approx(16)
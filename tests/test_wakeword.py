@@ -0,0 +1,72 @@
+import asyncio
+
+from app.pipeline import Pipeline
+from app.speech import FixtureEngine, Transcriber, fake_pcm
+from app.wakeword import FixtureSpotter, WakeGate
+
+SILENCE = b"\x00\x00" * 16000
+
+
+def chunked(pcm, size):
+    return [pcm[i:i + size] for i in range(0, len(pcm), size)]
+
+
+def test_spotter_finds_phrase_split_across_chunks():
+    spotter = FixtureSpotter.from_texts()
+    noise = fake_pcm("clatter of pans")
+    pcm = noise + fake_pcm("hey invyntra") + b"after"
+    offsets = [spotter.feed(chunk) for chunk in chunked(pcm, 3001)]
+    hits = [(i, at) for i, at in enumerate(offsets) if at is not None]
+    assert len(hits) == 1
+    i, at = hits[0]
+    assert (i * 3001 + at) == len(pcm) - len(b"after")
+
+
+def test_spotter_from_files(tmp_path):
+    path = tmp_path / "wake.pcm"
+    path.write_bytes(fake_pcm("hey invyntra"))
+    spotter = FixtureSpotter.from_files([path])
+    assert spotter.feed(fake_pcm("hey invyntra")) == len(path.read_bytes())
+    assert spotter.feed(fake_pcm("dish pit")) is None
+
+
+def test_gate_drops_noise_and_closes_on_silence():
+    gate = WakeGate(FixtureSpotter.from_texts(), silence=0.5)
+    command = fake_pcm("86 the salmon")
+    assert gate(fake_pcm("kitchen noise " * 5)) is None
+    assert gate(fake_pcm("hey invyntra") + command) == command
+    assert gate.open
+    assert gate(SILENCE) == SILENCE
+    assert not gate.open
+    assert gate(command) is None
+    assert gate.wakes == 1
+    assert gate.stats()["forwarded"] == len(command) + len(SILENCE)
+
+
+def test_gate_caps_listening_time():
+    gate = WakeGate(FixtureSpotter.from_texts(), max_seconds=1.0)
+    gate(fake_pcm("hey invyntra"))
+    forwarded = gate(fake_pcm("a very long rambling story about prep"))
+    assert len(forwarded) == 32000
+    assert not gate.open
+
+
+def test_gated_pipeline_transcribes_only_after_wake():
+    texts = ["add two cases of tomatoes", "86 the salmon"]
+    applied = []
+    transcribe = Transcriber(FixtureEngine.from_texts(texts))
+    gate = WakeGate(FixtureSpotter.from_texts(), silence=0.5)
+    pcm = (fake_pcm("86 the salmon") + fake_pcm("hey invyntra")
+           + fake_pcm("add two cases of tomatoes") + SILENCE
+           + fake_pcm("86 the salmon"))
+
+    async def mic():
+        for chunk in chunked(pcm, 3200):
+            yield chunk
+
+    stats = asyncio.run(Pipeline(transcribe, lambda t: t, applied.append,
+                                 gate=gate).run(mic()))
+    assert applied == ["add two cases of tomatoes"]
+    assert [s["stage"] for s in stats[1:]] == ["wake", "transcribe", "parse",
+                                               "apply"]
+    assert gate.stats()["forwarded_ratio"] < 0.6
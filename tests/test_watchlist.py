@@ -0,0 +1,69 @@
+import numpy as np
+
+from app.intents import IntentParser
+from app.ledger import Ledger
+from app.main import apply_intent
+from app.txlog import TransactionLog
+from app.watchlist import Watchlist
+
+
+def make_ledger():
+    ledger = Ledger()
+    ledger.add_item("butter", unit="lb", par=10, qty=20)
+    ledger.add_item("flour", unit="lb", par=50, qty=10)
+    ledger.add_item("salmon", unit="lb", par=8, qty=6)
+    ledger.add_item("napkins", par=0, qty=0)
+    return ledger
+
+
+def test_tracks_writes_and_orders_by_days_of_cover():
+    ledger = make_ledger()
+    watch = Watchlist(ledger, daily_usage=[5, 2, 4, 0])
+    assert watch.items() == [2, 1]
+    ledger.adjust(0, -15)
+    assert watch.items() == [0, 2, 1]
+    assert len(watch) == 3
+    ledger.set_qty(1, 60)
+    ledger.set_par(2, 5)
+    assert watch.items() == [0]
+    ledger.apply([1, 1], [-30, -30])
+    assert watch.items() == [1, 0]
+    assert watch.items(limit=1) == [1]
+
+
+def test_new_items_and_items_without_usage():
+    ledger = make_ledger()
+    watch = Watchlist(ledger)
+    ledger.add_item("lemons", par=10, qty=1)
+    assert watch.items() == [4, 1, 2]
+
+
+def test_matches_full_scan_under_random_writes():
+    rng = np.random.default_rng(5)
+    ledger = Ledger()
+    for i in range(500):
+        ledger.add_item(f"sku {i}", par=10, qty=float(rng.integers(0, 20)))
+    watch = Watchlist(ledger, daily_usage=rng.uniform(0.5, 3, 500))
+    for _ in range(2000):
+        ledger.adjust(int(rng.integers(500)), float(rng.integers(-5, 6)))
+    assert sorted(watch.items()) == ledger.below_par().tolist()
+    assert len(watch.heap) <= 2 * len(watch) + 64 + 1
+
+
+def test_replay_counts_update_watchlist(tmp_path):
+    ledger = make_ledger()
+    watch = Watchlist(ledger)
+    with TransactionLog(tmp_path / "stock.log") as log:
+        log.append(0, 1, op=1)
+        log.replay(ledger)
+    assert 0 in watch.items()
+
+
+def test_voice_query(tmp_path):
+    ledger = make_ledger()
+    watch = Watchlist(ledger, daily_usage=[5, 2, 4, 0])
+    intent = IntentParser(ledger)("what do I need to order")
+    assert intent.action == "low"
+    with TransactionLog(tmp_path / "stock.log") as log:
+        reply = apply_intent(ledger, log, intent, watchlist=watch)
+    assert reply == "Running low: salmon, flour"